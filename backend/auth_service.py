@@ -176,6 +176,20 @@ class ForaAuthService:
         """Get session cookies for API requests"""
         return self._get_session_cookies()
     
+    def get_session_state(self) -> Dict[str, Any]:
+        """
+        Session cookies plus the session's expiry, for handing the login to a browser.
+        The session is only re-validated with Fora once the cached token has expired.
+        """
+        try:
+            self.get_access_token()
+        except Exception as e:
+            logger.warning(f"Could not validate session, using the configured cookie as is: {e}")
+        return {
+            "cookies": self.get_session_cookies(),
+            "expires": self._token_expires
+        }
+    
     def is_authenticated(self) -> bool:
         """Check if we have a valid authentication"""
         try:
@@ -0,0 +1,137 @@
+import bisect
+import threading
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SUGGESTION_TYPES = ("hotel", "city", "destination")
+
+# Upper bound on prefix matches examined per query, so one-letter queries stay fast
+MAX_SCANNED_MATCHES = 5000
+
+def normalize(text: str) -> str:
+    """Casefold and strip accents so 'Zürich' matches 'zur'"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return " ".join("".join(char for char in decomposed if not unicodedata.combining(char)).casefold().split())
+
+class AutocompleteIndex:
+    """
+    Prefix index over hotel names, cities and destinations of every supplier the backend
+    has seen. Keys live in a sorted array and are looked up with binary search; every word
+    boundary of a term is indexed so 'plaza' finds 'The Plaza Hotel'.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # term key -> term; a term is one suggestion (a hotel, a city or a destination)
+        self._terms: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._hotel_cities: Dict[str, Tuple[str, ...]] = {}
+        self._keys: List[str] = []
+        self._key_terms: List[Tuple[str, str]] = []
+        self._dirty = False
+
+    def _upsert_term(self, kind: str, label: str, supplier_id: Optional[str] = None, weight: int = 0, **extra):
+        term_key = (kind, supplier_id or normalize(label))
+        term = self._terms.get(term_key)
+        if term is None:
+            self._terms[term_key] = {"type": kind, "label": label, "id": supplier_id, "weight": weight, **extra}
+            self._insert_keys(term_key, label)
+        elif kind == "hotel":
+            if term["label"] != label:
+                # Renames are rare; drop the stale keys with a full rebuild on the next query
+                self._dirty = True
+            term.update({"label": label, "weight": weight, **extra})
+        else:
+            term["weight"] += weight
+
+    @staticmethod
+    def _label_keys(label: str) -> List[str]:
+        words = normalize(label).split(" ")
+        return [" ".join(words[start:]) for start in range(len(words))]
+
+    def _insert_keys(self, term_key: Tuple[str, str], label: str):
+        for key in self._label_keys(label):
+            position = bisect.bisect_right(self._keys, key)
+            self._keys.insert(position, key)
+            self._key_terms.insert(position, term_key)
+
+    def add(self, record: Dict[str, Any]) -> bool:
+        """Index one supplier record; returns False if it has no id or name"""
+        supplier_id = record.get("id") if isinstance(record, dict) else None
+        name = record.get("name") if supplier_id else None
+        if not isinstance(name, str) or not name.strip():
+            return False
+
+        city = record.get("physical_city") or ""
+        country = record.get("physical_country") or ""
+        location = record.get("location") or ""
+        places = tuple(value for value in (city, location) if isinstance(value, str) and value.strip())
+
+        with self._lock:
+            self._upsert_term(
+                "hotel", name.strip(), supplier_id,
+                weight=int(record.get("total_review_count") or 0),
+                city=city or None, country=country or None
+            )
+            # A hotel only counts once toward its city's and destination's popularity
+            if self._hotel_cities.get(supplier_id) != places:
+                self._hotel_cities[supplier_id] = places
+                if city:
+                    label = f"{city}, {country}" if country else city
+                    self._upsert_term("city", label, weight=1, city=city, country=country or None)
+                if location and normalize(location) != normalize(city):
+                    self._upsert_term("destination", location.strip(), weight=1)
+        return True
+
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        return sum(1 for record in records if self.add(record))
+
+    def _rebuild(self):
+        pairs = [(key, term_key) for term_key, term in self._terms.items() for key in self._label_keys(term["label"])]
+        pairs.sort()
+        self._keys = [key for key, _ in pairs]
+        self._key_terms = [term_key for _, term_key in pairs]
+        self._dirty = False
+
+    def suggest(self, query: str, limit: int = 10, types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Ranked suggestions whose label has a word starting with the query"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        allowed = set(types or SUGGESTION_TYPES)
+
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+            start = bisect.bisect_left(self._keys, prefix)
+            end = bisect.bisect_right(self._keys, prefix + "\uffff", lo=start)
+
+            best = {}
+            for position in range(start, min(end, start + MAX_SCANNED_MATCHES)):
+                term_key = self._key_terms[position]
+                term = self._terms[term_key]
+                if term["type"] not in allowed:
+                    continue
+                # Matching from the start of the label ranks above a match on a later word
+                starts_label = self._keys[position] == normalize(term["label"])
+                best[term_key] = max(best.get(term_key, False), starts_label)
+
+            ranked = sorted(
+                best.items(),
+                key=lambda item: (
+                    not item[1],
+                    -self._terms[item[0]]["weight"],
+                    len(self._terms[item[0]]["label"]),
+                    self._terms[item[0]]["label"]
+                )
+            )
+            return [
+                {key: value for key, value in self._terms[term_key].items() if key != "weight" and value is not None}
+                for term_key, _ in ranked[:limit]
+            ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._terms)
+
+# Global instance
+autocomplete_index = AutocompleteIndex()
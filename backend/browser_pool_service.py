@@ -0,0 +1,293 @@
+import os
+import time
+import itertools
+import threading
+import psutil
+from collections import Counter, deque
+from typing import Any, Callable, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_browser_ids = itertools.count(1)
+
+def driver_pid(driver: Any) -> Optional[int]:
+    """PID of the chromedriver process behind a WebDriver, if it runs locally"""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return getattr(process, "pid", None)
+
+def process_tree_rss(pid: Optional[int]) -> Optional[int]:
+    """
+    Resident memory in bytes of a process and all its descendants (chromedriver, Chrome and
+    its renderers). Shared pages are counted once per process, so this overstates a little.
+    """
+    if pid is None:
+        return None
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return total
+
+class PooledBrowser:
+    """A launched browser plus the bookkeeping the pool needs to manage it"""
+
+    def __init__(self, driver: Any):
+        self.id = next(_browser_ids)
+        self.driver = driver
+        self.pid = driver_pid(driver)
+        self.created_at = time.time()
+        self.jobs = 0
+        self.rss_bytes: Optional[int] = None
+        self.sampled_at: Optional[float] = None
+
+    def sample(self) -> Optional[int]:
+        """Measure the browser's process-tree memory"""
+        self.rss_bytes = process_tree_rss(self.pid)
+        self.sampled_at = time.time()
+        return self.rss_bytes
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "pid": self.pid,
+            "jobs": self.jobs,
+            "age_seconds": round(time.time() - self.created_at, 1),
+            "rss_mb": None if self.rss_bytes is None else round(self.rss_bytes / 1048576, 1),
+            "sampled_at": self.sampled_at
+        }
+
+class BrowserPoolTimeout(Exception):
+    """Raised when no browser becomes free within the checkout timeout"""
+
+class BrowserPool:
+    """
+    Keeps up to SELENIUM_POOL_SIZE headless Chrome instances launched and logged in.
+    Jobs check a browser out, use it, and check it back in; the pool resets its state
+    between jobs and replaces browsers that fail a health check.
+
+    Long-lived Chrome instances grow, so browsers are also recycled (quit and relaunched on
+    demand) once they have run SELENIUM_BROWSER_MAX_JOBS jobs, are older than
+    SELENIUM_BROWSER_MAX_AGE seconds or use more than SELENIUM_BROWSER_MAX_RSS_MB of memory;
+    0 disables a limit. Memory is sampled on check-in and by the watchdog thread.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        reset: Optional[Callable[[Any], None]] = None,
+        size: int = None
+    ):
+        self.size = size or int(os.getenv("SELENIUM_POOL_SIZE", "1"))
+        self.checkout_timeout = float(os.getenv("SELENIUM_POOL_CHECKOUT_TIMEOUT", "120"))
+        self.max_jobs = int(os.getenv("SELENIUM_BROWSER_MAX_JOBS", "100"))
+        self.max_age = float(os.getenv("SELENIUM_BROWSER_MAX_AGE", "3600"))
+        self.max_rss_mb = float(os.getenv("SELENIUM_BROWSER_MAX_RSS_MB", "1024"))
+        self.watchdog_interval = float(os.getenv("SELENIUM_WATCHDOG_INTERVAL", "30"))
+        self._factory = factory
+        self._reset = reset
+        self._condition = threading.Condition()
+        self._idle = deque()
+        # Browsers that exist (idle, checked out or launching)
+        self._count = 0
+        # Launched browsers by id, idle or checked out
+        self._browsers: Dict[int, PooledBrowser] = {}
+        self._recycled = Counter()
+        self._report: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._closed = False
+
+    def _launch(self) -> PooledBrowser:
+        try:
+            browser = PooledBrowser(self._factory())
+        except Exception:
+            with self._condition:
+                self._count -= 1
+                self._condition.notify()
+            raise
+        browser.sample()
+        with self._condition:
+            self._browsers[browser.id] = browser
+        return browser
+
+    @staticmethod
+    def is_healthy(browser: PooledBrowser) -> bool:
+        """A browser is healthy if its session still answers a trivial script"""
+        try:
+            return browser.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _discard(self, browser: PooledBrowser, reason: Optional[str] = None):
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            print(f"Error quitting pooled browser: {e}")
+        with self._condition:
+            self._browsers.pop(browser.id, None)
+            if reason:
+                self._recycled[reason] += 1
+            self._count -= 1
+            self._condition.notify()
+
+    def recycle_reason(self, browser: PooledBrowser) -> Optional[str]:
+        """Why a browser should be replaced ('jobs', 'age' or 'rss'), or None to keep it"""
+        if self.max_jobs and browser.jobs >= self.max_jobs:
+            return "jobs"
+        if self.max_age and time.time() - browser.created_at >= self.max_age:
+            return "age"
+        if self.max_rss_mb and browser.rss_bytes is not None and browser.rss_bytes >= self.max_rss_mb * 1048576:
+            return "rss"
+        return None
+
+    def _recycle(self, browser: PooledBrowser, reason: str):
+        details = browser.to_dict()
+        print(f"Recycling pooled browser {browser.id} ({reason}): {details['jobs']} jobs, "
+              f"{details['age_seconds']}s old, {details['rss_mb']} MB")
+        self._discard(browser, reason)
+
+    def checkout(self, timeout: float = None) -> PooledBrowser:
+        """Take an idle browser, launching one if the pool has room; blocks while all are busy"""
+        deadline = time.time() + (self.checkout_timeout if timeout is None else timeout)
+        while True:
+            with self._condition:
+                while not self._idle and self._count >= self.size:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise BrowserPoolTimeout(f"No browser became free within {self.checkout_timeout}s")
+                    self._condition.wait(remaining)
+                if self._idle:
+                    browser = self._idle.popleft()
+                else:
+                    self._count += 1
+                    browser = None
+
+            if browser is None:
+                print("Launching browser for pool...")
+                return self._launch()
+            reason = self.recycle_reason(browser)
+            if reason:
+                self._recycle(browser, reason)
+                continue
+            if self.is_healthy(browser):
+                return browser
+            print("Pooled browser failed health check, replacing it")
+            self._discard(browser, "unhealthy")
+
+    def checkin(self, browser: PooledBrowser):
+        """Return a browser after a job; it is reset, or dropped if it is due for recycling or the reset fails"""
+        browser.jobs += 1
+        browser.sample()
+        try:
+            reason = self.recycle_reason(browser)
+            if reason:
+                self._recycle(browser, reason)
+                return
+            try:
+                if self._reset:
+                    self._reset(browser.driver)
+            except Exception as e:
+                print(f"Pooled browser reset failed, dropping it: {e}")
+                self._discard(browser, "reset_failed")
+                return
+            self._return_idle(browser)
+        finally:
+            self.report()
+
+    def _return_idle(self, browser: PooledBrowser):
+        """Make a browser available to the next job, or quit it if the pool was closed"""
+        with self._condition:
+            if self._closed:
+                closed = True
+            else:
+                closed = False
+                self._idle.append(browser)
+                self._condition.notify()
+        if closed:
+            self._discard(browser)
+
+    def warm(self) -> int:
+        """Launch browsers until the pool is full; returns how many were started"""
+        launched = 0
+        while True:
+            with self._condition:
+                if self._closed or self._count >= self.size:
+                    return launched
+                self._count += 1
+            browser = self._launch()
+            launched += 1
+            self._return_idle(browser)
+
+    def close(self):
+        """Quit every idle browser; browsers still checked out are quit on check-in"""
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            # Also wakes the watchdog so it exits
+            self._condition.notify_all()
+        for browser in idle:
+            self._discard(browser)
+
+    def sample_all(self):
+        """Sample every browser's memory and recycle idle ones that are due"""
+        with self._condition:
+            browsers = list(self._browsers.values())
+        for browser in browsers:
+            browser.sample()
+        with self._condition:
+            due = [(browser, self.recycle_reason(browser)) for browser in self._idle]
+            due = [(browser, reason) for browser, reason in due if reason]
+            for browser, _ in due:
+                self._idle.remove(browser)
+        # Checked-out browsers are only measured; they are recycled when checked in
+        for browser, reason in due:
+            self._recycle(browser, reason)
+        self.report()
+
+    def start_watchdog(self, report: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Sample the browsers every SELENIUM_WATCHDOG_INTERVAL seconds in a daemon thread.
+        `report` is called with stats() after every sample and check-in.
+        """
+        self._report = report
+        if self._watchdog is not None or not self.watchdog_interval:
+            return
+        self._watchdog = threading.Thread(target=self._watchdog_loop, name="browser-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def _watchdog_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed, self.watchdog_interval)
+                if self._closed:
+                    return
+            try:
+                self.sample_all()
+            except Exception as e:
+                print(f"Browser watchdog sample failed: {e}")
+
+    def report(self):
+        if self._report:
+            try:
+                self._report(self.stats())
+            except Exception as e:
+                print(f"Could not report browser pool stats: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "size": self.size,
+                "browsers": self._count,
+                "idle": len(self._idle),
+                "limits": {"max_jobs": self.max_jobs, "max_age": self.max_age, "max_rss_mb": self.max_rss_mb},
+                "recycled": dict(self._recycled),
+                "browser_stats": [browser.to_dict() for browser in self._browsers.values()]
+            }
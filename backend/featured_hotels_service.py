@@ -0,0 +1,113 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import requests
+from typing import Any, Callable, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_FEATURED_HOTELS_URL = "https://api.fora.travel/v2/user-supplier-list/bdd9fe6d-4482-4996-9508-536f89c2008d/suppliers/"
+
+class FeaturedHotelsService:
+    """
+    Keeps the home page's featured hotel list in memory. The list is fetched in the
+    background from startup on and refreshed periodically, so serving it never waits on
+    Fora. Until the first fetch succeeds, requests may trigger a retry, at most once every
+    FEATURED_HOTELS_RETRY_SECONDS.
+    """
+
+    def __init__(self):
+        self.url = os.getenv("FEATURED_HOTELS_URL", DEFAULT_FEATURED_HOTELS_URL)
+        self.refresh_interval = int(os.getenv("FEATURED_HOTELS_REFRESH_SECONDS", "900"))
+        self.retry_interval = int(os.getenv("FEATURED_HOTELS_RETRY_SECONDS", "30"))
+        self._hotels: Optional[List[Any]] = None
+        self._etag: Optional[str] = None
+        self._last_refreshed: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Fetch in flight (shared by concurrent callers) and when the last one started
+        self._inflight: Optional[asyncio.Task] = None
+        self._last_attempt: Optional[float] = None
+        # Called with the hotel list after every successful refresh
+        self.on_refresh: Optional[Callable[[List[Any]], None]] = None
+
+    def fetch(self) -> List[Any]:
+        """Fetch the featured supplier list from Fora (blocking)"""
+        headers = {
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        }
+        print(f"Making featured hotels request to: {self.url}")
+        response = requests.get(self.url, headers=headers, timeout=20)
+        response.raise_for_status()
+        data = response.json()
+        if not isinstance(data, list):
+            raise ValueError(f"Unexpected featured hotels payload type: {type(data).__name__}")
+        return data
+
+    async def refresh(self) -> bool:
+        """Refresh the in-memory list, keeping the previous copy if the fetch fails"""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self._inflight)
+
+    async def _refresh(self) -> bool:
+        self._last_attempt = time.time()
+        try:
+            hotels = await asyncio.to_thread(self.fetch)
+        except Exception as e:
+            print(f"Featured hotels refresh failed, keeping previous list: {e}")
+            return False
+
+        payload = json.dumps(hotels, sort_keys=True).encode()
+        self._etag = f'"{hashlib.sha256(payload).hexdigest()[:32]}"'
+        self._hotels = hotels
+        self._last_refreshed = time.time()
+        print(f"Featured hotels refreshed: {len(hotels)} hotels")
+        if self.on_refresh:
+            self.on_refresh(hotels)
+        return True
+
+    async def _refresh_loop(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
+
+    async def ensure_loaded(self) -> bool:
+        """
+        Retry the fetch for a request that found no list yet. Concurrent requests share one
+        fetch, and no new fetch starts within retry_interval of the last attempt.
+        """
+        if self._hotels is not None:
+            return True
+        if self._inflight is not None and not self._inflight.done():
+            return await asyncio.shield(self._inflight)
+        if self._last_attempt is not None and time.time() - self._last_attempt < self.retry_interval:
+            return False
+        return await self.refresh()
+
+    async def start(self):
+        """Schedule the first load and periodic refreshes without delaying startup"""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    def get_hotels(self) -> Optional[List[Any]]:
+        return self._hotels
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self._etag
+
+    @property
+    def last_refreshed(self) -> Optional[float]:
+        return self._last_refreshed
+
+# Global instance
+featured_hotels_service = FeaturedHotelsService()
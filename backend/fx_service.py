@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import asyncio
+import requests
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Money fields of a rate summary record that get converted
+CONVERTED_FIELDS = ("total", "nightly_rate")
+
+class FXUnavailableError(RuntimeError):
+    """Raised when a conversion is requested before any FX table has been loaded"""
+
+class FXService:
+    """
+    Keeps an FX table in memory so rates fetched once in a base currency can be shown in
+    other currencies without new upstream calls. The table comes from a local JSON file
+    (FX_RATES_FILE) and/or a URL that is refreshed in the background (FX_RATES_URL).
+    Converted amounts are indicative only; bookings are always priced by Fora.
+    """
+
+    def __init__(self):
+        self.file_path = os.getenv("FX_RATES_FILE", "")
+        self.url = os.getenv("FX_RATES_URL", "")
+        self.refresh_interval = int(os.getenv("FX_REFRESH_SECONDS", "3600"))
+        # (base currency, currency -> column index, units of each currency per 1 base, as_of)
+        self._table = None
+        self._last_refreshed: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def parse(payload: Dict[str, Any]):
+        """
+        Build a table from `{"base": "USD", "as_of": "...", "rates": {"EUR": 0.92, ...}}`.
+        `base_code` and `time_last_update_utc` are accepted as aliases.
+        """
+        base = str(payload.get("base") or payload.get("base_code") or "").upper()
+        rates = payload.get("rates")
+        if not base or not isinstance(rates, dict):
+            raise ValueError("FX table needs a base currency and a rates object")
+
+        units = {base: 1.0}
+        for currency, value in rates.items():
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                continue
+            if value > 0:
+                units[str(currency).upper()] = value
+        codes = sorted(units)
+        index = {currency: position for position, currency in enumerate(codes)}
+        column = np.array([units[currency] for currency in codes])
+        as_of = payload.get("as_of") or payload.get("time_last_update_utc")
+        return base, index, column, as_of
+
+    def fetch(self) -> Dict[str, Any]:
+        """Load the raw FX payload from FX_RATES_URL, or from FX_RATES_FILE (blocking)"""
+        if self.url:
+            print(f"Making FX rates request to: {self.url}")
+            response = requests.get(self.url, headers={'Accept': 'application/json'}, timeout=20)
+            response.raise_for_status()
+            return response.json()
+        with open(self.file_path, encoding="utf-8") as fx_file:
+            return json.load(fx_file)
+
+    async def refresh(self) -> bool:
+        """Reload the table, keeping the previous one if loading fails"""
+        try:
+            payload = await asyncio.to_thread(self.fetch)
+            table = self.parse(payload)
+        except Exception as e:
+            print(f"FX rates refresh failed, keeping previous table: {e}")
+            if self.url and self.file_path and self._table is None:
+                # Fall back to the local file until the source is reachable
+                try:
+                    with open(self.file_path, encoding="utf-8") as fx_file:
+                        table = self.parse(json.load(fx_file))
+                except Exception as file_error:
+                    print(f"FX rates file fallback failed: {file_error}")
+                    return False
+            else:
+                return False
+
+        self._table = table
+        self._last_refreshed = time.time()
+        print(f"FX rates loaded: {len(table[1])} currencies, base {table[0]}")
+        return True
+
+    async def _refresh_loop(self):
+        while True:
+            await self.refresh()
+            if not self.url:
+                # A local file is only read once
+                return
+            # Until a first table loads, retry sooner than the regular refresh
+            await asyncio.sleep(self.refresh_interval if self.available else min(self.refresh_interval, 60))
+
+    async def start(self):
+        """
+        Load the table in the background if a source is configured, so an unreachable
+        FX source never delays startup; only a URL source is refreshed periodically.
+        """
+        if not (self.url or self.file_path) or self._refresh_task is not None:
+            return
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    @property
+    def available(self) -> bool:
+        return self._table is not None
+
+    def _require_table(self):
+        table = self._table
+        if table is None:
+            raise FXUnavailableError("No FX table loaded; set FX_RATES_FILE or FX_RATES_URL")
+        return table
+
+    def factors(self, from_currencies: Sequence[Any], to_currency: str) -> np.ndarray:
+        """
+        Multipliers converting amounts in each of `from_currencies` into `to_currency`.
+        Unknown source currencies get NaN; an unknown target currency raises ValueError.
+        """
+        base, index, column, _ = self._require_table()
+        target = to_currency.upper()
+        if target not in index:
+            raise ValueError(f"Unsupported display currency: {to_currency}")
+
+        codes = np.array([str(currency or "").upper() for currency in from_currencies], dtype=object)
+        if len(codes) == 0:
+            return np.empty(0)
+        # Look up each distinct currency once, then broadcast back over the rows
+        distinct, inverse = np.unique(codes, return_inverse=True)
+        positions = np.array([index.get(currency, -1) for currency in distinct])
+        source_units = np.where(positions >= 0, column[np.maximum(positions, 0)], np.nan)[inverse]
+        return column[index[target]] / source_units
+
+    def convert_rates(self, rates: List[Any], to_currency: str) -> List[Any]:
+        """
+        Return copies of rate summary records with their money fields converted into
+        `to_currency`. Converted records keep the original amounts and are flagged
+        `is_indicative`; records already in that currency or in an unknown one are unchanged.
+        """
+        target = to_currency.upper()
+        records = [rate for rate in rates if isinstance(rate, dict)]
+        factors = self.factors([rate.get("currency") for rate in records], target)
+        converted_columns = {}
+        for field in CONVERTED_FIELDS:
+            amounts = np.array([_number(rate.get(field)) for rate in records])
+            converted_columns[field] = np.round(amounts * factors, 2)
+
+        converted = {}
+        for row, rate in enumerate(records):
+            if str(rate.get("currency") or "").upper() == target or np.isnan(factors[row]):
+                continue
+            copy = {**rate, "currency": target, "original_currency": rate.get("currency"), "is_indicative": True}
+            for field in CONVERTED_FIELDS:
+                if field in rate:
+                    copy[f"original_{field}"] = rate[field]
+                    value = converted_columns[field][row]
+                    copy[field] = None if np.isnan(value) else float(value)
+            converted[id(rate)] = copy
+        return [converted.get(id(rate), rate) for rate in rates]
+
+    def describe(self, to_currency: Optional[str] = None) -> Dict[str, Any]:
+        """Metadata attached to converted responses"""
+        base, _, _, as_of = self._require_table()
+        info = {"base_currency": base, "as_of": as_of, "indicative": True}
+        if to_currency:
+            info["display_currency"] = to_currency.upper()
+        return info
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The whole table, for clients that convert on their own"""
+        base, index, column, as_of = self._require_table()
+        return {
+            **self.describe(),
+            "last_refreshed": self._last_refreshed,
+            "rates": {currency: float(column[position]) for currency, position in index.items()}
+        }
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+# Global instance
+fx_service = FXService()
@@ -0,0 +1,129 @@
+import os
+import math
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# Fields kept per supplier; enough to render a map pin or a hotel card
+SUMMARY_FIELDS = (
+    "id", "name", "location", "coordinates", "hotel_class", "average_review_rating",
+    "total_review_count", "physical_city", "physical_state", "physical_country",
+    "brand_name", "images", "labels", "is_bookable"
+)
+
+def extract_coordinates(record: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Return (latitude, longitude) from a supplier record, or None if it has none"""
+    coordinates = record.get("coordinates") or {}
+    latitude = coordinates.get("latitude", coordinates.get("lat", record.get("latitude")))
+    longitude = coordinates.get("longitude", coordinates.get("lng", record.get("longitude")))
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+class GeoIndex:
+    """
+    In-memory uniform grid over every supplier the backend has seen. Radius and
+    bounding-box queries only visit the grid cells they overlap.
+    """
+
+    def __init__(self, cell_size_degrees: float = None):
+        self.cell_size = cell_size_degrees or float(os.getenv("GEO_INDEX_CELL_DEGREES", "0.25"))
+        self._lock = threading.Lock()
+        self._cells = defaultdict(set)
+        self._points: Dict[str, Tuple[float, float]] = {}
+        self._records: Dict[str, Dict[str, Any]] = {}
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size)
+
+    def add(self, record: Dict[str, Any]) -> bool:
+        """Index one supplier record; returns False if it has no id or coordinates"""
+        supplier_id = record.get("id") if isinstance(record, dict) else None
+        point = extract_coordinates(record) if supplier_id else None
+        if point is None:
+            return False
+
+        summary = {field: record[field] for field in SUMMARY_FIELDS if field in record}
+        with self._lock:
+            previous = self._points.get(supplier_id)
+            if previous is not None and previous != point:
+                self._cells[self._cell(*previous)].discard(supplier_id)
+            self._points[supplier_id] = point
+            self._cells[self._cell(*point)].add(supplier_id)
+            # Keep fields from richer records (e.g. hotel details) when a sparser one arrives
+            self._records[supplier_id] = {**self._records.get(supplier_id, {}), **summary}
+        return True
+
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        return sum(1 for record in records if self.add(record))
+
+    def _ids_in_cell_range(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> Iterable[str]:
+        min_row, min_col = self._cell(min_lat, min_lon)
+        max_row, max_col = self._cell(max_lat, max_lon)
+        cell_count = (max_row - min_row + 1) * (max_col - min_col + 1)
+        if cell_count > len(self._cells):
+            # Viewport covers more cells than exist; walking the occupied cells is cheaper
+            for (row, col), ids in self._cells.items():
+                if min_row <= row <= max_row and min_col <= col <= max_col:
+                    yield from ids
+            return
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                yield from self._cells.get((row, col), ())
+
+    def nearby(self, latitude: float, longitude: float, radius_km: float, limit: int = 50) -> List[Dict[str, Any]]:
+        """Suppliers within radius_km of a point, nearest first"""
+        lat_delta = radius_km / KM_PER_DEGREE_LAT
+        cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+        lon_delta = min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180)
+        min_lat, max_lat = max(latitude - lat_delta, -90), min(latitude + lat_delta, 90)
+
+        if longitude - lon_delta < -180 or longitude + lon_delta > 180:
+            lon_ranges = [(-180, 180)]
+        else:
+            lon_ranges = [(longitude - lon_delta, longitude + lon_delta)]
+
+        matches = []
+        with self._lock:
+            for min_lon, max_lon in lon_ranges:
+                for supplier_id in self._ids_in_cell_range(min_lat, max_lat, min_lon, max_lon):
+                    distance = haversine_km(latitude, longitude, *self._points[supplier_id])
+                    if distance <= radius_km:
+                        matches.append((distance, supplier_id))
+            matches.sort()
+            return [{**self._records[supplier_id], "distance_km": round(distance, 3)} for distance, supplier_id in matches[:limit]]
+
+    def within_bounds(self, south: float, west: float, north: float, east: float, limit: int = 500) -> List[Dict[str, Any]]:
+        """Suppliers inside a map viewport; west > east means the viewport crosses the antimeridian"""
+        lon_ranges = [(west, east)] if west <= east else [(west, 180), (-180, east)]
+        results = []
+        with self._lock:
+            for min_lon, max_lon in lon_ranges:
+                for supplier_id in self._ids_in_cell_range(south, north, min_lon, max_lon):
+                    latitude, longitude = self._points[supplier_id]
+                    if south <= latitude <= north and min_lon <= longitude <= max_lon:
+                        results.append(self._records[supplier_id])
+                        if len(results) >= limit:
+                            return results
+        return results
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._points)
+
+# Global instance
+geo_index = GeoIndex()
@@ -1,11 +1,16 @@
 import os
 import requests
 import json
-from fastapi import FastAPI, HTTPException, Query, Path
+from fastapi import FastAPI, HTTPException, Query, Path, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 from dotenv import load_dotenv
+from typing import Any, Dict, Optional
+from contextlib import asynccontextmanager
+from email.utils import formatdate
+from datetime import date, timedelta
+from urllib.parse import urlencode
 import asyncio
 import json
 import time
@@ -15,6 +20,15 @@ load_dotenv()
 
 # Import auth service after loading environment variables
 from auth_service import auth_service
+from upstream_service import upstream_service
+from metrics_service import metrics_service
+from cache_service import TTLCache
+from featured_hotels_service import featured_hotels_service
+from rate_table_service import rate_table_service, SORT_COLUMNS
+from geo_index_service import geo_index
+from autocomplete_service import autocomplete_index, SUGGESTION_TYPES
+from fx_service import fx_service, FXUnavailableError
+from selenium_jobs_service import selenium_job_service
 
 # --- Configuration & Secrets ---
 # IMPORTANT: Create a file named `.env` in the `backend` directory.
@@ -23,7 +37,22 @@ from auth_service import auth_service
 # The bearer token will be automatically fetched from the session API
 
 # --- FastAPI App Initialization ---
-app = FastAPI()
+# Selenium workers (and their browsers) otherwise start with the first card job
+SELENIUM_START_ON_STARTUP = os.getenv("SELENIUM_START_ON_STARTUP", "false").lower() == "true"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background services with the app"""
+    await featured_hotels_service.start()
+    await fx_service.start()
+    if SELENIUM_START_ON_STARTUP:
+        selenium_job_service.start()
+    yield
+    selenium_job_service.stop()
+    await fx_service.stop()
+    await featured_hotels_service.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS (Cross-Origin Resource Sharing)
 # This allows your Next.js frontend (running on localhost:3000)
@@ -47,6 +76,87 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# --- Response Field Projection ---
+# Envelope keys whose list items are projected instead of the envelope itself,
+# so pagination metadata such as `count` and `next` is preserved.
+PROJECTION_ENVELOPE_KEYS = ("results", "data")
+
+def parse_fields_param(fields: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Parse a `fields=` query value such as "id,name,coordinates.latitude" into a
+    nested projection tree. Returns None when no projection was requested.
+    """
+    if not fields:
+        return None
+
+    tree: Dict[str, Any] = {}
+    for path in fields.split(","):
+        parts = [part.strip() for part in path.split(".") if part.strip()]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            child = node.get(part, {})
+            if child is None:
+                # A shorter path already selected the whole subtree
+                break
+            node = node.setdefault(part, child)
+        else:
+            node[parts[-1]] = None
+
+    return tree or None
+
+def _project_value(value: Any, tree: Optional[Dict[str, Any]]):
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [_project_value(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: _project_value(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
+
+def project_fields(data: Any, fields: Optional[str]):
+    """
+    Prune an upstream response down to the requested fields before it is serialized.
+    Lists are projected item by item, and for `{"results": [...]}` / `{"data": [...]}`
+    envelopes the projection applies to the items while other top-level keys are kept.
+    """
+    tree = parse_fields_param(fields)
+    if tree is None:
+        return data
+
+    if isinstance(data, dict):
+        envelope_key = next((key for key in PROJECTION_ENVELOPE_KEYS if isinstance(data.get(key), list)), None)
+        if envelope_key:
+            projected = dict(data)
+            projected[envelope_key] = _project_value(data[envelope_key], tree)
+            return projected
+
+    return _project_value(data, tree)
+
+
+# --- Client Disconnect Handling ---
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", "0.25"))
+
+async def run_upstream_for_request(request: Request, key, func, *args):
+    """
+    Run an upstream call on behalf of a request, sharing it with identical in-flight calls,
+    and stop waiting as soon as the client disconnects. The shared call itself is only
+    cancelled once every client waiting on it has gone.
+    """
+    call = asyncio.ensure_future(upstream_service.run_shared(key, func, *args))
+    while True:
+        done, _ = await asyncio.wait({call}, timeout=DISCONNECT_POLL_SECONDS)
+        if done:
+            return call.result()
+        if await request.is_disconnected():
+            call.cancel()
+            metrics_service.increment("upstream.client_disconnects")
+            print(f"Client disconnected, abandoning upstream call: {key}")
+            # 499 (client closed request); nobody is listening for this response
+            raise HTTPException(status_code=499, detail="Client closed request")
+
+
 # --- API Scraping Logic ---
 def get_hotel_data(search_query: str):
     """
@@ -87,17 +197,100 @@ def get_hotel_data(search_query: str):
         raise HTTPException(status_code=500, detail="An internal server error occurred.")
 
 
+# --- Local Supplier Indexes ---
+def record_suppliers(records):
+    """
+    Feed supplier records seen in any upstream response into the local indexes,
+    so later geo and autocomplete queries can be answered without calling Fora.
+    """
+    if isinstance(records, dict):
+        records = [records]
+    if not isinstance(records, list):
+        return
+    records = [record for record in records if isinstance(record, dict)]
+    geo_index.add_many(records)
+    autocomplete_index.add_many(records)
+
+featured_hotels_service.on_refresh = record_suppliers
+
+
+# --- Hotel Details Cache & Search Prefetch ---
+HOTEL_DETAILS_CACHE_TTL = int(os.getenv("HOTEL_DETAILS_CACHE_TTL", "600"))
+SEARCH_PREFETCH_TOP_N = int(os.getenv("SEARCH_PREFETCH_TOP_N", "0"))
+SEARCH_PREFETCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_PREFETCH_MAX_CONCURRENCY", "2"))
+
+hotel_details_cache = TTLCache(HOTEL_DETAILS_CACHE_TTL, max_entries=500)
+# Hotel IDs whose cached details came from a prefetch and have not been read yet
+prefetched_hotel_ids = TTLCache(HOTEL_DETAILS_CACHE_TTL, max_entries=500)
+# Prefetches take at most this many slots of the upstream budget, leaving the rest for live requests
+prefetch_semaphore = asyncio.Semaphore(SEARCH_PREFETCH_MAX_CONCURRENCY)
+
+def get_hotel_details_cached(hotel_id: str):
+    """
+    Return hotel details from the cache when available, otherwise fetch and cache them.
+    """
+    details = hotel_details_cache.get(hotel_id)
+    if details is not None:
+        metrics_service.increment("hotel_details.cache_hits")
+        if prefetched_hotel_ids.pop(hotel_id):
+            metrics_service.increment("prefetch.hits")
+        return details
+
+    metrics_service.increment("hotel_details.cache_misses")
+    details = get_hotel_details_data(hotel_id)
+    hotel_details_cache.set(hotel_id, details)
+    record_suppliers(details)
+    return details
+
+async def prefetch_hotel_details(hotel_ids):
+    """
+    Warm the hotel details cache for hotels an agent is likely to open next.
+    Runs as a background task after the search response has been sent.
+    """
+    async def prefetch_one(hotel_id: str):
+        if hotel_id in hotel_details_cache:
+            metrics_service.increment("prefetch.skipped")
+            return
+        async with prefetch_semaphore:
+            try:
+                details = await upstream_service.run(get_hotel_details_data, hotel_id)
+            except Exception as e:
+                print(f"Prefetch of hotel details failed for '{hotel_id}': {e}")
+                metrics_service.increment("prefetch.failed")
+                return
+        hotel_details_cache.set(hotel_id, details)
+        prefetched_hotel_ids.set(hotel_id, True)
+        record_suppliers(details)
+        metrics_service.increment("prefetch.completed")
+
+    metrics_service.increment("prefetch.scheduled", len(hotel_ids))
+    await asyncio.gather(*(prefetch_one(hotel_id) for hotel_id in hotel_ids))
+
 # --- API Endpoint ---
 @app.get("/api/search")
-async def search_hotels(query: str = Query(..., min_length=2, description="The search term for hotels or destinations.")):
+async def search_hotels(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    query: str = Query(..., min_length=2, description="The search term for hotels or destinations."),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to keep on each result, e.g. id,name,images"),
+    prefetch: int = Query(SEARCH_PREFETCH_TOP_N, ge=0, le=20, description="Prefetch hotel details for the top N results after responding"),
+    session_id: Optional[str] = Query(None, description="Search session to record the results in for server-side sorting")
+):
     """
     API endpoint to search for hotels. It takes a 'query' parameter.
     """
     print(f"Received search request for: '{query}'")
     try:
-        data = get_hotel_data(query)
+        data = await run_upstream_for_request(request, ("search", query), get_hotel_data, query)
         print(f"/api/search result: {json.dumps(data, indent=2)}")
-        return data
+        if prefetch and isinstance(data, dict):
+            top_ids = [hotel["id"] for hotel in data.get("results", [])[:prefetch] if hotel.get("id")]
+            background_tasks.add_task(prefetch_hotel_details, top_ids)
+        if isinstance(data, dict):
+            record_suppliers(data.get("results", []))
+        if session_id and isinstance(data, dict):
+            rate_table_service.add_hotels(session_id, data.get("results", []))
+        return project_fields(data, fields)
     except HTTPException as e:
         # Re-raise HTTPException to let FastAPI handle the response
         raise e
@@ -152,7 +345,7 @@ async def get_trips(client_id: str = Query(..., description="The client ID to se
     """
     print(f"Received trips request for client: '{client_id}'")
     try:
-        data = get_trips_data(client_id)
+        data = await upstream_service.run(get_trips_data, client_id)
         print(f"/api/trips result: {json.dumps(data, indent=2)}")
         return data
     except HTTPException as e:
@@ -209,7 +402,7 @@ async def get_trip_details(trip_id: str = Path(..., description="The trip ID to
     """
     print(f"Received trip details request for trip: '{trip_id}'")
     try:
-        data = get_trip_details_data(trip_id)
+        data = await upstream_service.run(get_trip_details_data, trip_id)
         print(f"/api/trips/{trip_id} result: {json.dumps(data, indent=2)}")
         return data
     except HTTPException as e:
@@ -219,6 +412,48 @@ async def get_trip_details(trip_id: str = Path(..., description="The trip ID to
         print(f"Error in /api/trips/{trip_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+TRIPS_OVERVIEW_MAX_DETAILS = int(os.getenv("TRIPS_OVERVIEW_MAX_DETAILS", "30"))
+
+@app.get("/api/trips-overview")
+async def get_trips_overview(
+    client_id: str = Query(..., description="The client ID to search trips for."),
+    max_details: int = Query(TRIPS_OVERVIEW_MAX_DETAILS, ge=0, le=100, description="How many trips to expand with full details.")
+):
+    """
+    API endpoint to get a client's trips with trip details already merged in. The trip
+    list is fetched first, then the details of the first `max_details` trips are fetched
+    concurrently under the upstream budget instead of one browser round trip per trip.
+    """
+    print(f"Received trips overview request for client: '{client_id}' (max_details: {max_details})")
+    trips = await upstream_service.run(get_trips_data, client_id)
+    trip_list = trips.get("results", []) if isinstance(trips, dict) else []
+    trip_list = [trip for trip in trip_list if isinstance(trip, dict)] if isinstance(trip_list, list) else []
+
+    async def fetch_details(trip_id: str):
+        try:
+            return trip_id, await upstream_service.run(get_trip_details_data, trip_id), None
+        except HTTPException as e:
+            return trip_id, None, {"status_code": e.status_code, "detail": e.detail}
+        except Exception as e:
+            print(f"Error fetching details for trip '{trip_id}': {e}")
+            return trip_id, None, {"status_code": 500, "detail": "An internal server error occurred."}
+
+    expand_ids = [trip["id"] for trip in trip_list[:max_details] if trip.get("id")]
+    details_by_id = {}
+    errors = {}
+    for trip_id, details, error in await asyncio.gather(*(fetch_details(trip_id) for trip_id in expand_ids)):
+        if error:
+            errors[trip_id] = error
+        else:
+            details_by_id[trip_id] = details
+
+    # A list or null payload still gets the overview envelope
+    overview = dict(trips) if isinstance(trips, dict) else {}
+    overview["results"] = [{**trip, "details": details_by_id.get(trip.get("id"))} for trip in trip_list]
+    overview["details_expanded"] = len(details_by_id)
+    overview["errors"] = errors
+    return overview
+
 def get_rate_summary(request_data: dict):
     """
     Calls the Fora Travel rate summary API to get hotel rates.
@@ -268,10 +503,131 @@ def get_rate_summary(request_data: dict):
         print(f"Unexpected error in get_rate_summary: {e}")
         raise HTTPException(status_code=500, detail="An internal server error occurred.")
 
+# --- Rate Cache ---
+# Rates change with availability, so entries are short-lived and dropped as soon as a
+# booking or cancellation touches the supplier.
+RATE_CACHE_TTL = int(os.getenv("RATE_CACHE_TTL", "120"))
+rate_cache = TTLCache(RATE_CACHE_TTL, max_entries=5000)
+_RATE_CACHE_MISS = object()
+
+def _rate_summary_stay(request_data: dict):
+    return (
+        request_data.get("start_date"),
+        request_data.get("end_date"),
+        request_data.get("number_of_adults"),
+        request_data.get("rooms"),
+        str(request_data.get("currency", "")).upper(),
+        tuple(sorted(request_data.get("children_ages") or [])),
+        json.dumps(request_data.get("filters") or {}, sort_keys=True)
+    )
+
+def rate_summary_cache_key(request_data: dict, supplier_id: str):
+    """Canonical stay tuple for one supplier in a rate summary request"""
+    return ("summary", supplier_id) + _rate_summary_stay(request_data)
+
+def rate_summary_envelope_key(request_data: dict):
+    """Key of a stay's response envelope: the upstream top-level keys other than `data`"""
+    return ("summary_envelope", None) + _rate_summary_stay(request_data)
+
+def hotel_rates_cache_key(hotel_id: str, number_of_adults: int, rooms: int, currency: str, start_date: str, end_date: str):
+    """Canonical stay tuple for a single hotel's rates"""
+    return ("hotel", hotel_id, start_date, end_date, number_of_adults, rooms, currency.upper())
+
+def get_rate_summary_cached(request_data: dict):
+    """
+    Rate summary with per-supplier caching: only suppliers without a fresh cached rate
+    are sent upstream, and suppliers without a rate are cached as such too.
+    """
+    supplier_ids = request_data.get("supplier_ids", [])
+    rates_by_supplier = {}
+    missing_ids = []
+    for supplier_id in supplier_ids:
+        cached = rate_cache.get(rate_summary_cache_key(request_data, supplier_id), _RATE_CACHE_MISS)
+        if cached is _RATE_CACHE_MISS:
+            missing_ids.append(supplier_id)
+        else:
+            rates_by_supplier[supplier_id] = cached
+    envelope = rate_cache.get(rate_summary_envelope_key(request_data))
+    if not missing_ids and envelope is None:
+        # Every rate is cached but the envelope was evicted; fetch again so the shape matches
+        missing_ids = list(supplier_ids)
+    metrics_service.increment("rate_cache.hits", len(supplier_ids) - len(missing_ids))
+    metrics_service.increment("rate_cache.misses", len(missing_ids))
+
+    if missing_ids:
+        data = get_rate_summary({**request_data, "supplier_ids": missing_ids})
+        if not isinstance(data, dict) or not isinstance(data.get("data"), list):
+            # Unknown response shape; pass it through uncached
+            return data
+        returned = {rate.get("id"): rate for rate in data["data"] if isinstance(rate, dict)}
+        for supplier_id in missing_ids:
+            rates_by_supplier[supplier_id] = returned.get(supplier_id)
+            rate_cache.set(rate_summary_cache_key(request_data, supplier_id), returned.get(supplier_id))
+        envelope = {key: value for key, value in data.items() if key != "data"}
+        rate_cache.set(rate_summary_envelope_key(request_data), envelope)
+
+    result = dict(envelope)
+    result["data"] = [rates_by_supplier[supplier_id] for supplier_id in supplier_ids if rates_by_supplier.get(supplier_id) is not None]
+    return result
+
+def get_hotel_rates_cached(hotel_id: str, number_of_adults: int, rooms: int, currency: str, start_date: str, end_date: str):
+    """
+    Hotel rates for one stay, served from the rate cache while fresh.
+    """
+    key = hotel_rates_cache_key(hotel_id, number_of_adults, rooms, currency, start_date, end_date)
+    cached = rate_cache.get(key)
+    if cached is not None:
+        metrics_service.increment("rate_cache.hits")
+        return cached
+
+    metrics_service.increment("rate_cache.misses")
+    data = get_hotel_rates_data(hotel_id, number_of_adults, rooms, currency, start_date, end_date)
+    rate_cache.set(key, data)
+    return data
+
+def invalidate_supplier_rates(supplier_id: Optional[str] = None):
+    """
+    Drop cached rates for a supplier, or every cached rate when the supplier is unknown.
+    """
+    if supplier_id:
+        removed = rate_cache.invalidate(lambda key: key[1] == supplier_id)
+    else:
+        removed = len(rate_cache)
+        rate_cache.clear()
+    metrics_service.increment("rate_cache.invalidations", removed)
+    print(f"Invalidated {removed} cached rates for supplier: {supplier_id or 'all'}")
+
+def convert_rate_summary(data: Dict[str, Any], display_currency: str) -> Dict[str, Any]:
+    """Copy of a rate summary response with its rates converted locally into display_currency"""
+    try:
+        converted = fx_service.convert_rates(data.get("data", []), display_currency)
+        return {**data, "data": converted, "fx": fx_service.describe(display_currency)}
+    except FXUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get('/api/fx-rates')
+def get_fx_rates():
+    """
+    API endpoint returning the local FX table used for indicative currency conversion.
+    """
+    try:
+        return fx_service.snapshot()
+    except FXUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
 @app.post("/api/rates")
-async def get_rates(request: Request):
+async def get_rates(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to keep on each rate, e.g. id,total,currency"),
+    session_id: Optional[str] = Query(None, description="Search session to record the rates in for server-side sorting"),
+    display_currency: Optional[str] = Query(None, description="Convert rates locally into this currency (indicative)")
+):
     """
     API endpoint to get hotel rates. It takes a JSON payload with all required fields.
+    With `display_currency`, rates are fetched (or served from cache) in the request's
+    `currency` and converted locally, so switching display currency needs no upstream call.
     """
     try:
         request_data = await request.json()
@@ -291,17 +647,24 @@ async def get_rates(request: Request):
         if len(request_data.get('supplier_ids', [])) > 10:
             raise HTTPException(status_code=400, detail="supplier_ids cannot have more than 10 elements")
         
-        data = get_rate_summary(request_data)
+        rates_key = ("rates", json.dumps(request_data, sort_keys=True))
+        data = await run_upstream_for_request(request, rates_key, get_rate_summary_cached, request_data)
         print(f"/api/rates result: {json.dumps(data, indent=2)}")
-        return data
+        if session_id and isinstance(data, dict):
+            rate_table_service.add_rates(session_id, data.get("data", []))
+        if display_currency and isinstance(data, dict):
+            data = convert_rate_summary(data, display_currency)
+        return project_fields(data, fields)
     except HTTPException as e:
         raise e
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
         raise HTTPException(status_code=500, detail="An internal server error occurred.")
 
-@app.get('/api/hotel-details/{hotel_id}')
-def get_hotel_details(hotel_id: str = Path(...)):
+def get_hotel_details_data(hotel_id: str):
+    """
+    Calls the real Fora Travel API to get the full supplier record for a hotel.
+    """
     try:
         # Get authentication headers with automatic token refresh
         headers = auth_service.get_auth_headers()
@@ -333,11 +696,234 @@ def get_hotel_details(hotel_id: str = Path(...)):
     except requests.exceptions.RequestException as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch hotel details: {e}")
     except Exception as e:
-        print(f"Unexpected error in get_hotel_details: {e}")
+        print(f"Unexpected error in get_hotel_details_data: {e}")
         raise HTTPException(status_code=500, detail="An internal server error occurred.")
 
-@app.get('/api/filtered-hotels')
-def get_filtered_hotels(view_mode: str, adults: int, dates: str, rooms: int, q: str, currency: str):
+# --- Flexible Dates Price Calendar ---
+PRICE_CALENDAR_MAX_SHIFTS = int(os.getenv("PRICE_CALENDAR_MAX_SHIFTS", "62"))
+RATE_SUMMARY_MAX_SUPPLIERS = 10
+
+def _validate_price_calendar(calendar_data: Dict[str, Any]):
+    required_fields = ['supplier_ids', 'window_start', 'window_end', 'nights', 'number_of_adults', 'currency']
+    missing_fields = [field for field in required_fields if field not in calendar_data]
+    if missing_fields:
+        raise HTTPException(status_code=400, detail=f"Missing required fields: {missing_fields}")
+
+    supplier_ids = calendar_data.get('supplier_ids')
+    if not isinstance(supplier_ids, list) or not supplier_ids:
+        raise HTTPException(status_code=400, detail="supplier_ids must be a non-empty list")
+    if len(supplier_ids) > 50:
+        raise HTTPException(status_code=400, detail="supplier_ids cannot have more than 50 elements")
+
+    try:
+        window_start = date.fromisoformat(calendar_data['window_start'])
+        window_end = date.fromisoformat(calendar_data['window_end'])
+        nights = int(calendar_data['nights'])
+        step_days = int(calendar_data.get('step_days', 1))
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date window: {e}")
+    if window_end < window_start:
+        raise HTTPException(status_code=400, detail="window_end must not be before window_start")
+    if nights < 1 or step_days < 1:
+        raise HTTPException(status_code=400, detail="nights and step_days must be at least 1")
+
+    check_in_dates = []
+    check_in = window_start
+    while check_in <= window_end:
+        check_in_dates.append(check_in)
+        check_in += timedelta(days=step_days)
+    if len(check_in_dates) > PRICE_CALENDAR_MAX_SHIFTS:
+        raise HTTPException(status_code=400, detail=f"Date window has {len(check_in_dates)} check-in dates; the maximum is {PRICE_CALENDAR_MAX_SHIFTS}")
+
+    return supplier_ids, check_in_dates, nights
+
+@app.post('/api/price-calendar')
+async def get_price_calendar(request: Request):
+    """
+    API endpoint to build a flexible-dates price calendar. For every check-in date in the
+    window it fetches rate summaries for all suppliers (stay length `nights`), running the
+    date shifts concurrently under the upstream budget and reusing cached rates.
+    """
+    calendar_data = await request.json()
+    supplier_ids, check_in_dates, nights = _validate_price_calendar(calendar_data)
+    print(f"Received price calendar request for {len(supplier_ids)} hotels over {len(check_in_dates)} check-in dates")
+
+    base_request = {
+        "currency": calendar_data["currency"],
+        "number_of_adults": calendar_data["number_of_adults"],
+        "children_ages": calendar_data.get("children_ages", []),
+        "filters": calendar_data.get("filters", {})
+    }
+    if "rooms" in calendar_data:
+        base_request["rooms"] = calendar_data["rooms"]
+    supplier_chunks = [supplier_ids[i:i + RATE_SUMMARY_MAX_SUPPLIERS] for i in range(0, len(supplier_ids), RATE_SUMMARY_MAX_SUPPLIERS)]
+
+    async def fetch_column(check_in: date):
+        stay = {**base_request, "start_date": check_in.isoformat(), "end_date": (check_in + timedelta(days=nights)).isoformat()}
+        totals = {supplier_id: None for supplier_id in supplier_ids}
+        error = None
+        chunk_requests = [{**stay, "supplier_ids": chunk} for chunk in supplier_chunks]
+        # All chunks of a column go out together; upstream_service bounds the concurrency
+        responses = await asyncio.gather(*[
+            upstream_service.run_shared(("rates", json.dumps(chunk_request, sort_keys=True)), get_rate_summary_cached, chunk_request)
+            for chunk_request in chunk_requests
+        ], return_exceptions=True)
+        for data in responses:
+            if isinstance(data, HTTPException):
+                error = {"status_code": data.status_code, "detail": data.detail}
+                continue
+            if isinstance(data, BaseException):
+                if isinstance(data, asyncio.CancelledError):
+                    raise data
+                print(f"Error fetching price calendar column {stay['start_date']}: {data}")
+                error = {"status_code": 500, "detail": "An internal server error occurred."}
+                continue
+            for rate in data.get("data", []) if isinstance(data, dict) else []:
+                if isinstance(rate, dict) and rate.get("id") in totals:
+                    totals[rate["id"]] = rate.get("total")
+        return {"start_date": stay["start_date"], "end_date": stay["end_date"], "totals": totals, "error": error}
+
+    def cheapest_by_supplier(columns):
+        cheapest = {}
+        for column in columns:
+            for supplier_id, total in column["totals"].items():
+                if total is not None and (supplier_id not in cheapest or total < cheapest[supplier_id]["total"]):
+                    cheapest[supplier_id] = {"start_date": column["start_date"], "end_date": column["end_date"], "total": total}
+        return cheapest
+
+    columns = [fetch_column(check_in) for check_in in check_in_dates]
+
+    if calendar_data.get("stream"):
+        async def generate_columns():
+            completed = []
+            for next_column in asyncio.as_completed(columns):
+                column = await next_column
+                completed.append(column)
+                yield f"data: {json.dumps({'type': 'column', **column})}\n\n"
+            yield f"data: {json.dumps({'type': 'done', 'cheapest': cheapest_by_supplier(completed)})}\n\n"
+
+        return StreamingResponse(
+            generate_columns(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive"
+            }
+        )
+
+    completed = await asyncio.gather(*columns)
+    return {
+        "supplier_ids": supplier_ids,
+        "nights": nights,
+        "dates": [column["start_date"] for column in completed],
+        # prices[i][j] is the total for supplier_ids[i] checking in on dates[j] (null = no rate)
+        "prices": [[column["totals"][supplier_id] for column in completed] for supplier_id in supplier_ids],
+        "cheapest": cheapest_by_supplier(completed),
+        "errors": {column["start_date"]: column["error"] for column in completed if column["error"]}
+    }
+
+@app.get('/api/rates/session/{session_id}')
+def get_session_rates(
+    session_id: str = Path(..., description="Search session passed to /api/search and /api/rates"),
+    sort_by: str = Query("price", description=f"One of: {', '.join(SORT_COLUMNS)}"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="Sort order"),
+    min_price: Optional[float] = Query(None, description="Minimum total price"),
+    max_price: Optional[float] = Query(None, description="Maximum total price"),
+    refundable: Optional[bool] = Query(None, description="Only refundable (true) or non-refundable (false) rates"),
+    commissionable: Optional[bool] = Query(None, description="Only commissionable (true) or non-commissionable (false) rates"),
+    min_rating: Optional[float] = Query(None, description="Minimum average review rating"),
+    include_unrated: bool = Query(False, description="Include hotels that have no rate yet"),
+    page: int = Query(1, ge=1, description="Page number"),
+    page_size: int = Query(20, ge=1, le=200, description="Results per page"),
+    display_currency: Optional[str] = Query(None, description="Convert prices locally into this currency (indicative); price filters use it too")
+):
+    """
+    API endpoint to sort, filter and paginate the rates collected for a search session.
+    """
+    table = rate_table_service.get(session_id)
+    if table is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired search session: {session_id}")
+    try:
+        results = table.query(
+            sort_by=sort_by,
+            descending=order == "desc",
+            min_price=min_price,
+            max_price=max_price,
+            refundable=refundable,
+            commissionable=commissionable,
+            min_rating=min_rating,
+            rated_only=not include_unrated,
+            page=page,
+            page_size=page_size,
+            display_currency=display_currency
+        )
+        if display_currency:
+            results["fx"] = fx_service.describe(display_currency)
+        return results
+    except FXUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get('/api/autocomplete')
+def autocomplete(
+    q: str = Query(..., min_length=1, description="What the user has typed so far"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions"),
+    types: Optional[str] = Query(None, description=f"Comma-separated suggestion types to include: {', '.join(SUGGESTION_TYPES)}")
+):
+    """
+    API endpoint for search-as-you-type suggestions, answered from the local prefix index.
+    Upstream search is only needed once the user commits a query via /api/search.
+    """
+    requested_types = [value.strip() for value in types.split(",") if value.strip()] if types else None
+    if requested_types and not set(requested_types) <= set(SUGGESTION_TYPES):
+        raise HTTPException(status_code=400, detail=f"types must be a subset of: {', '.join(SUGGESTION_TYPES)}")
+    suggestions = autocomplete_index.suggest(q, limit, requested_types)
+    return {"query": q, "suggestions": suggestions}
+
+@app.get('/api/nearby-hotels')
+def get_nearby_hotels(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the center point"),
+    lng: float = Query(..., ge=-180, le=180, description="Longitude of the center point"),
+    radius_km: float = Query(10, gt=0, le=500, description="Search radius in kilometers"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of hotels to return")
+):
+    """
+    API endpoint to find hotels within a radius, answered from the local geo index.
+    """
+    results = geo_index.nearby(lat, lng, radius_km, limit)
+    return {"count": len(results), "indexed": len(geo_index), "results": results}
+
+@app.get('/api/map-hotels')
+def get_map_hotels(
+    south: float = Query(..., ge=-90, le=90, description="Southern edge of the viewport"),
+    west: float = Query(..., ge=-180, le=180, description="Western edge of the viewport"),
+    north: float = Query(..., ge=-90, le=90, description="Northern edge of the viewport"),
+    east: float = Query(..., ge=-180, le=180, description="Eastern edge of the viewport"),
+    limit: int = Query(500, ge=1, le=2000, description="Maximum number of hotels to return")
+):
+    """
+    API endpoint to list hotels inside a map viewport, answered from the local geo index.
+    """
+    if south > north:
+        raise HTTPException(status_code=400, detail="south must not be greater than north")
+    results = geo_index.within_bounds(south, west, north, east, limit)
+    return {"count": len(results), "indexed": len(geo_index), "results": results}
+
+@app.get('/api/hotel-details/{hotel_id}')
+def get_hotel_details(
+    hotel_id: str = Path(...),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to keep, e.g. id,name,description")
+):
+    """
+    API endpoint to get detailed information for a specific hotel.
+    """
+    return project_fields(get_hotel_details_cached(hotel_id), fields)
+
+def get_filtered_hotels_data(view_mode: str, adults: int, dates: str, rooms: int, q: str, currency: str):
+    """
+    Calls the Fora advisor API to get hotels matching the search filters.
+    """
     try:
         # Get authentication headers with automatic token refresh
         headers = auth_service.get_auth_headers()
@@ -368,20 +954,32 @@ def get_filtered_hotels(view_mode: str, adults: int, dates: str, rooms: int, q:
     except requests.exceptions.RequestException as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch filtered hotels: {e}")
     except Exception as e:
-        print(f"Unexpected error in get_filtered_hotels: {e}")
+        print(f"Unexpected error in get_filtered_hotels_data: {e}")
         raise HTTPException(status_code=500, detail="An internal server error occurred.")
 
-@app.get('/api/hotel-rates/{hotel_id}')
-def get_hotel_rates(
-    hotel_id: str = Path(...),
-    number_of_adults: int = Query(..., description="Number of adults"),
-    rooms: int = Query(..., description="Number of rooms"),
-    currency: str = Query(..., description="Currency code"),
-    start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
-    end_date: str = Query(..., description="End date (YYYY-MM-DD)")
+@app.get('/api/filtered-hotels')
+async def get_filtered_hotels(
+    request: Request,
+    view_mode: str,
+    adults: int,
+    dates: str,
+    rooms: int,
+    q: str,
+    currency: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to keep on each hotel, e.g. id,name,coordinates")
 ):
     """
-    API endpoint to get hotel rates for a specific hotel.
+    API endpoint to get hotels matching the search filters.
+    """
+    filters = (view_mode, adults, dates, rooms, q, currency)
+    data = await run_upstream_for_request(request, ("filtered-hotels",) + filters, get_filtered_hotels_data, *filters)
+    if isinstance(data, dict):
+        record_suppliers(data.get("results", []))
+    return project_fields(data, fields)
+
+def get_hotel_rates_data(hotel_id: str, number_of_adults: int, rooms: int, currency: str, start_date: str, end_date: str):
+    """
+    Calls the real Fora Travel API to get bookable rates for a specific hotel.
     """
     try:
         # Get authentication headers with automatic token refresh
@@ -432,9 +1030,89 @@ def get_hotel_rates(
     except requests.exceptions.RequestException as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch hotel rates: {e}")
     except Exception as e:
-        print(f"Unexpected error in get_hotel_rates: {e}")
+        print(f"Unexpected error in get_hotel_rates_data: {e}")
         raise HTTPException(status_code=500, detail="An internal server error occurred.")
 
+@app.get('/api/hotel-rates/{hotel_id}')
+def get_hotel_rates(
+    hotel_id: str = Path(...),
+    number_of_adults: int = Query(..., description="Number of adults"),
+    rooms: int = Query(..., description="Number of rooms"),
+    currency: str = Query(..., description="Currency code"),
+    start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="End date (YYYY-MM-DD)")
+):
+    """
+    API endpoint to get hotel rates for a specific hotel.
+    """
+    return get_hotel_rates_cached(hotel_id, number_of_adults, rooms, currency, start_date, end_date)
+
+async def _fetch_hotel_page_section(section: str, func, *args):
+    """
+    Run one hotel-page section through the upstream budget, turning failures into an
+    error entry so one slow or failing section does not sink the whole page.
+    """
+    try:
+        return section, await upstream_service.run(func, *args), None
+    except HTTPException as e:
+        return section, None, {"status_code": e.status_code, "detail": e.detail}
+    except Exception as e:
+        print(f"Error fetching hotel page section '{section}': {e}")
+        return section, None, {"status_code": 500, "detail": "An internal server error occurred."}
+
+@app.get('/api/hotel-page/{hotel_id}')
+async def get_hotel_page(
+    hotel_id: str = Path(...),
+    client_id: Optional[str] = Query(None, description="Client whose cards should be included"),
+    number_of_adults: Optional[int] = Query(None, description="Number of adults"),
+    rooms: Optional[int] = Query(None, description="Number of rooms"),
+    currency: Optional[str] = Query(None, description="Currency code"),
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to keep on the hotel details"),
+    stream: bool = Query(False, description="Stream each section as a server-sent event as soon as it is ready")
+):
+    """
+    API endpoint that fetches hotel details, hotel rates and (optionally) client cards
+    concurrently and returns them as one document. Rates are only fetched when all
+    stay parameters are given.
+    """
+    print(f"Received hotel page request for hotel: '{hotel_id}' (client: {client_id}, stream: {stream})")
+
+    sections = [_fetch_hotel_page_section("details", get_hotel_details_cached, hotel_id)]
+    stay_params = [number_of_adults, rooms, currency, start_date, end_date]
+    if all(param is not None for param in stay_params):
+        sections.append(_fetch_hotel_page_section("rates", get_hotel_rates_cached, hotel_id, *stay_params))
+    if client_id:
+        sections.append(_fetch_hotel_page_section("cards", get_client_cards_data, client_id))
+
+    def finalize(section: str, data):
+        return project_fields(data, fields) if section == "details" else data
+
+    if stream:
+        async def generate_sections():
+            for next_section in asyncio.as_completed(sections):
+                section, data, error = await next_section
+                event = {"type": "section", "section": section, "data": finalize(section, data), "error": error}
+                yield f"data: {json.dumps(event)}\n\n"
+            yield f"data: {json.dumps({'type': 'done', 'hotel_id': hotel_id})}\n\n"
+
+        return StreamingResponse(
+            generate_sections(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive"
+            }
+        )
+
+    page = {"hotel_id": hotel_id, "details": None, "rates": None, "cards": None, "errors": {}}
+    for section, data, error in await asyncio.gather(*sections):
+        page[section] = finalize(section, data)
+        if error:
+            page["errors"][section] = error
+    return page
+
 @app.get('/api/clients')
 def get_clients(
     search: str = Query('', description="Search query for clients"),
@@ -734,6 +1412,8 @@ async def create_booking(request: Request):
         print(f"Request payload size: {len(json.dumps(booking_data))} bytes")
         
         response = requests.post(url, headers=headers, cookies=cookies, json=booking_data, timeout=20)
+        # Any booking attempt may consume the offer, so cached rates for this supplier are stale
+        invalidate_supplier_rates(booking_data['supplier_id'])
         
         print(f"Response status: {response.status_code}")
         print(f"Response headers: {dict(response.headers)}")
@@ -790,6 +1470,7 @@ async def create_booking(request: Request):
                 print("Authentication failed, attempting token refresh...")
                 headers = auth_service.get_auth_headers(force_refresh=True)
                 response = requests.post(url, headers=headers, cookies=cookies, json=booking_data, timeout=20)
+                invalidate_supplier_rates(booking_data['supplier_id'])
                 response.raise_for_status()
                 return response.json()
             except Exception as refresh_error:
@@ -828,10 +1509,9 @@ async def create_booking(request: Request):
         print(f"Unexpected error in create_booking: {e}")
         raise HTTPException(status_code=500, detail="An internal server error occurred.")
 
-@app.get('/api/clients/{client_id}/cards')
-def get_client_cards(client_id: str = Path(...)):
+def get_client_cards_data(client_id: str):
     """
-    API endpoint to get cards for a specific client.
+    Calls the real Fora Travel API to get the cards stored on a client.
     """
     try:
         headers = auth_service.get_auth_headers()
@@ -845,14 +1525,22 @@ def get_client_cards(client_id: str = Path(...)):
         # Return only the cards array
         return {"results": data.get("cards", [])}
     except Exception as e:
-        print(f"Unexpected error in get_client_cards: {e}")
+        print(f"Unexpected error in get_client_cards_data: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch client cards.")
 
-@app.post('/api/clients/{client_id}/cards')
-async def create_client_card(client_id: str = Path(...), request: Request = None):
+@app.get('/api/clients/{client_id}/cards')
+def get_client_cards(client_id: str = Path(...)):
     """
-    API endpoint to create a new card for a client (Fora two-step: POST then PUT).
+    API endpoint to get cards for a specific client.
+    """
+    return get_client_cards_data(client_id)
+
+def create_client_card_data(client_id: str, card_data: Dict[str, Any]):
     """
+    Calls the real Fora Travel API to create a card for a client (two steps: POST for a new card ID, then PUT the card data).
+    """
+    card_id = None
+    step = "POST"
     try:
         headers = auth_service.get_auth_headers()
         cookies = auth_service.get_session_cookies()
@@ -867,9 +1555,7 @@ async def create_client_card(client_id: str = Path(...), request: Request = None
         print(f"Step 1: Got card ID {card_id}")
         
         # Step 2: PUT card data
-        card_data = await request.json()
-        print(f"Step 2: PUT card data: {json.dumps(card_data, indent=2)}")
-        
+        step = "PUT"
         put_url = f'https://api.fora.travel/v1/clients/{client_id}/cards/{card_id}/'
         print(f"Step 2: PUT to {put_url}")
         put_resp = requests.put(put_url, headers=headers, cookies=cookies, json=card_data, timeout=20)
@@ -878,13 +1564,133 @@ async def create_client_card(client_id: str = Path(...), request: Request = None
             print(f"PUT request failed with status {put_resp.status_code}")
             print(f"PUT response: {put_resp.text}")
             put_resp.raise_for_status()
+        # The card is complete from here on; it must not be deleted
+        step = None
             
         result = put_resp.json()
-        print(f"Step 2: PUT successful, result: {json.dumps(result, indent=2)}")
+        print(f"Step 2: PUT successful for card {card_id}")
         return result
+    except requests.exceptions.RequestException as e:
+        # HTTP errors, timeouts and dropped connections are all handled alike
+        if e.response is not None:
+            status_code, reason = e.response.status_code, e.response.reason
+        elif isinstance(e, requests.exceptions.Timeout):
+            status_code, reason = 504, "timed out"
+        elif isinstance(e, requests.exceptions.ConnectionError):
+            status_code, reason = 502, "connection failed"
+        else:
+            status_code, reason = 502, type(e).__name__
+        if step is None:
+            detail = f"Card {card_id} was created but its PUT response could not be read: {reason}"
+        else:
+            detail = f"Card {step} failed: {reason}"
+        if card_id and step == "PUT":
+            # The POST already created the card; remove it so no empty card stays on the client
+            try:
+                delete_url = f'https://api.fora.travel/v1/clients/{client_id}/cards/{card_id}/'
+                requests.delete(delete_url, headers=headers, cookies=cookies, timeout=20).raise_for_status()
+                detail += f" (empty card {card_id} was deleted)"
+            except Exception as delete_error:
+                print(f"Could not delete empty card {card_id}: {delete_error}")
+                detail += f" (empty card {card_id} was left on the client)"
+        print(f"Error in create_client_card_data for client {client_id}: {detail}")
+        raise HTTPException(status_code=status_code, detail=detail)
     except Exception as e:
         print(f"Unexpected error in create_client_card: {e}")
-        raise HTTPException(status_code=500, detail="Failed to create client card.")
+        detail = "Failed to create client card."
+        if card_id:
+            detail += f" Card {card_id} was created during the {step or 'PUT'} step and may need cleanup."
+        raise HTTPException(status_code=500, detail=detail)
+
+@app.post('/api/clients/{client_id}/cards')
+async def create_client_card(client_id: str = Path(...), request: Request = None):
+    """
+    API endpoint to create a new card for a client (Fora two-step: POST then PUT).
+    """
+    card_data = await request.json()
+    return await upstream_service.run(create_client_card_data, client_id, card_data)
+
+# --- Bulk Card Creation ---
+BULK_CARDS_MAX_ITEMS = int(os.getenv("BULK_CARDS_MAX_ITEMS", "500"))
+BULK_CARDS_MAX_CONCURRENCY = int(os.getenv("BULK_CARDS_MAX_CONCURRENCY", "3"))
+# Bulk imports take at most this many slots of the upstream budget, leaving the rest for live requests
+bulk_cards_semaphore = asyncio.Semaphore(BULK_CARDS_MAX_CONCURRENCY)
+
+def _validate_bulk_cards(bulk_data: Dict[str, Any]):
+    items = bulk_data.get('items')
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="items must be a non-empty list")
+    if len(items) > BULK_CARDS_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"items cannot have more than {BULK_CARDS_MAX_ITEMS} elements")
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get('client_id') or not isinstance(item.get('card'), dict):
+            raise HTTPException(status_code=400, detail=f"items[{index}] needs a client_id and a card object")
+    return items
+
+@app.post('/api/cards/bulk')
+async def create_cards_bulk(request: Request):
+    """
+    API endpoint to create many cards across many clients through the direct Fora API
+    (POST then PUT per card, no browser). At most BULK_CARDS_MAX_CONCURRENCY cards are
+    created at a time across all bulk requests, within the upstream budget; one failing
+    card does not stop the others.
+    """
+    bulk_data = await request.json()
+    items = _validate_bulk_cards(bulk_data)
+    print(f"Received bulk card request for {len(items)} cards across {len({item['client_id'] for item in items})} clients")
+
+    # Refresh an expired token once up front instead of in every concurrent call
+    try:
+        await upstream_service.run(auth_service.get_auth_headers)
+    except Exception as e:
+        print(f"Authentication failed before bulk card creation: {e}")
+        raise HTTPException(status_code=401, detail="Authentication failed. Please check your session cookie.")
+
+    async def create_item(index: int, item: Dict[str, Any]):
+        result = {"index": index, "client_id": item["client_id"]}
+        if "reference" in item:
+            result["reference"] = item["reference"]
+        try:
+            async with bulk_cards_semaphore:
+                card = await upstream_service.run(create_client_card_data, item["client_id"], item["card"])
+        except HTTPException as e:
+            metrics_service.increment("cards.bulk_failed")
+            return {**result, "success": False, "status_code": e.status_code, "detail": e.detail}
+        except Exception as e:
+            print(f"Error creating bulk card {index}: {e}")
+            metrics_service.increment("cards.bulk_failed")
+            return {**result, "success": False, "status_code": 500, "detail": "An internal server error occurred."}
+        metrics_service.increment("cards.bulk_created")
+        return {**result, "success": True, "card": card}
+
+    creations = [create_item(index, item) for index, item in enumerate(items)]
+
+    if bulk_data.get("stream"):
+        async def generate_results():
+            succeeded = 0
+            for next_result in asyncio.as_completed(creations):
+                result = await next_result
+                succeeded += result["success"]
+                yield f"data: {json.dumps({'type': 'item', **result})}\n\n"
+            yield f"data: {json.dumps({'type': 'done', 'total': len(items), 'succeeded': succeeded, 'failed': len(items) - succeeded})}\n\n"
+
+        return StreamingResponse(
+            generate_results(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive"
+            }
+        )
+
+    results = await asyncio.gather(*creations)
+    succeeded = sum(result["success"] for result in results)
+    return {
+        "total": len(items),
+        "succeeded": succeeded,
+        "failed": len(items) - succeeded,
+        "results": results
+    }
 
 @app.put('/api/clients/{client_id}/cards/{card_id}')
 async def update_client_card(client_id: str = Path(...), card_id: str = Path(...), request: Request = None):
@@ -1017,6 +1823,162 @@ def reveal_client_card(client_id: str = Path(...), card_id: str = Path(...)):
         print(f"Unexpected error in reveal_client_card: {e}")
         raise HTTPException(status_code=500, detail="An internal server error occurred.")
 
+# --- Batch Requests ---
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "50"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "6"))
+BATCH_ALLOWED_METHODS = {"GET", "POST", "PUT", "DELETE"}
+
+async def dispatch_sub_request(method: str, path: str, query: Optional[Dict[str, Any]] = None, body: Any = None):
+    """
+    Run a request against this app in-process through its ASGI interface and
+    return (status_code, parsed_body). Routes, validation and error handling
+    behave exactly as they would for a request coming over the network.
+    """
+    path, _, raw_query = path.partition("?")
+    query_string = "&".join(part for part in [raw_query, urlencode(query or {}, doseq=True)] if part)
+    body_bytes = json.dumps(body).encode() if body is not None else b""
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query_string.encode(),
+        "headers": [
+            (b"host", b"batch.internal"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body_bytes)).encode())
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("batch.internal", 80)
+    }
+
+    request_sent = False
+    status_code = 500
+    content_type = ""
+    chunks = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body_bytes, "more_body": False}
+        # The sub-request never disconnects on its own; wait until the app stops listening
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status_code, content_type
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            headers = {key.decode().lower(): value.decode() for key, value in message.get("headers", [])}
+            content_type = headers.get("content-type", "")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+
+    raw_body = b"".join(chunks)
+    if "application/json" in content_type and raw_body:
+        return status_code, json.loads(raw_body)
+    return status_code, raw_body.decode(errors="replace")
+
+def _validate_batch(batch_data: Dict[str, Any]):
+    sub_requests = batch_data.get("requests")
+    if not isinstance(sub_requests, list) or not sub_requests:
+        raise HTTPException(status_code=400, detail="requests must be a non-empty list")
+    if len(sub_requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"requests cannot have more than {BATCH_MAX_REQUESTS} elements")
+
+    seen_ids = set()
+    for index, sub_request in enumerate(sub_requests):
+        if not isinstance(sub_request, dict):
+            raise HTTPException(status_code=400, detail=f"requests[{index}] must be an object")
+        request_id = str(sub_request.get("id", index))
+        if request_id in seen_ids:
+            raise HTTPException(status_code=400, detail=f"Duplicate request id: {request_id}")
+        seen_ids.add(request_id)
+
+        method = str(sub_request.get("method", "GET")).upper()
+        path = sub_request.get("path", "")
+        if method not in BATCH_ALLOWED_METHODS:
+            raise HTTPException(status_code=400, detail=f"Unsupported method for request '{request_id}': {method}")
+        if not isinstance(path, str) or not path.startswith("/api/") or path.startswith("/api/batch"):
+            raise HTTPException(status_code=400, detail=f"Invalid path for request '{request_id}': {path}")
+
+    return sub_requests
+
+@app.post('/api/batch')
+async def batch_requests(request: Request):
+    """
+    API endpoint to multiplex several API calls into one round trip. Sub-requests run
+    concurrently in-process (at most BATCH_MAX_CONCURRENCY at a time) and results are
+    returned keyed by request id, or streamed as server-sent events when "stream" is true.
+    """
+    batch_data = await request.json()
+    sub_requests = _validate_batch(batch_data)
+    print(f"Received batch request with {len(sub_requests)} sub-requests")
+
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+    async def run_sub_request(index: int, sub_request: Dict[str, Any]):
+        request_id = str(sub_request.get("id", index))
+        method = str(sub_request.get("method", "GET")).upper()
+        async with semaphore:
+            start_time = time.time()
+            try:
+                status_code, body = await dispatch_sub_request(
+                    method, sub_request["path"], sub_request.get("query"), sub_request.get("body")
+                )
+            except Exception as e:
+                print(f"Error in batch sub-request '{request_id}': {e}")
+                status_code, body = 500, {"detail": "An internal server error occurred."}
+        return request_id, {"status": status_code, "body": body, "duration_ms": round((time.time() - start_time) * 1000, 1)}
+
+    tasks = [run_sub_request(index, sub_request) for index, sub_request in enumerate(sub_requests)]
+
+    if batch_data.get("stream"):
+        async def generate_results():
+            for next_result in asyncio.as_completed(tasks):
+                request_id, result = await next_result
+                yield f"data: {json.dumps({'type': 'result', 'id': request_id, **result})}\n\n"
+            yield f"data: {json.dumps({'type': 'done', 'count': len(tasks)})}\n\n"
+
+        return StreamingResponse(
+            generate_results(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive"
+            }
+        )
+
+    return {"results": dict(await asyncio.gather(*tasks))}
+
+@app.get('/api/featured-hotels')
+async def get_featured_hotels(request: Request):
+    """
+    API endpoint to get the home page's featured hotels from the in-memory copy,
+    with cache headers so browsers and CDNs can reuse it between refreshes.
+    """
+    # Not loaded yet (first fetch still running or failed): wait for or retry it, rate-limited
+    await featured_hotels_service.ensure_loaded()
+    hotels = featured_hotels_service.get_hotels()
+    if hotels is None:
+        raise HTTPException(status_code=503, detail="Featured hotels are not available yet.")
+
+    cache_headers = {
+        "Cache-Control": f"public, max-age={featured_hotels_service.refresh_interval}, stale-while-revalidate=86400",
+        "ETag": featured_hotels_service.etag,
+        "Last-Modified": formatdate(featured_hotels_service.last_refreshed, usegmt=True)
+    }
+    if request.headers.get("if-none-match") == featured_hotels_service.etag:
+        return Response(status_code=304, headers=cache_headers)
+    return JSONResponse(content=hotels, headers=cache_headers)
+
 @app.get("/")
 def read_root():
     return {"status": "FastAPI server is running."}
@@ -1069,6 +2031,18 @@ def auth_status():
             "message": str(e)
         }
 
+@app.get("/api/metrics")
+def get_metrics():
+    """
+    Expose in-process counters (cache, prefetch, upstream, Selenium jobs), gauges (Selenium browsers) and duration histograms
+    """
+    snapshot = metrics_service.snapshot()
+    counters = snapshot["counters"]
+    prefetch_completed = counters.get("prefetch.completed", 0)
+    snapshot["prefetch_hit_rate"] = round(counters.get("prefetch.hits", 0) / prefetch_completed, 3) if prefetch_completed else None
+    snapshot["hotel_details_cache_size"] = len(hotel_details_cache)
+    return snapshot
+
 @app.get("/debug/client-structure")
 def debug_client_structure():
     """
@@ -1225,117 +2199,129 @@ async def test_client_creation(request: Request):
             "message": str(e)
         }
 
-@app.post('/api/selenium/create-card')
+@app.post('/api/selenium/create-card', status_code=202)
 async def create_card_with_selenium(request: Request):
     """
-    Create a card using Selenium automation with real-time progress updates.
+    Queue a card creation job for the Selenium workers. Returns the job ID right away;
+    poll /api/selenium/jobs/{job_id} for progress and the result.
     """
+    data = await request.json()
+    checkout_url = data.get('checkout_url')
+    card_data = data.get('card_data', {})
+    client_name = data.get('client_name', 'Testing 1')
+
+    if not checkout_url:
+        raise HTTPException(status_code=400, detail="checkout_url is required")
+
     try:
-        # Parse request data
-        data = await request.json()
-        checkout_url = data.get('checkout_url')
-        card_data = data.get('card_data', {})
-        client_name = data.get('client_name', 'Testing 1')
-        
-        if not checkout_url:
-            raise HTTPException(status_code=400, detail="checkout_url is required")
-            
-        # Import selenium service
-        from selenium_service import selenium_service
-        
-        # Create progress tracking function
-        progress_updates = []
-        
-        def progress_callback(message: str, percentage: int):
-            progress_updates.append({
-                "message": message,
-                "percentage": percentage,
-                "timestamp": time.time()
-            })
-        
-        # Set progress callback
-        selenium_service.set_progress_callback(progress_callback)
-        
-        # Run Selenium automation
-        result = await selenium_service.create_card_with_selenium(
-            checkout_url=checkout_url,
-            card_data=card_data,
-            client_name=client_name
-        )
-        
-        return {
-            "success": result["success"],
-            "message": result["message"],
-            "duration": result["duration"],
-            "progress_updates": progress_updates
-        }
-        
+        job = selenium_job_service.submit(checkout_url, card_data, client_name)
     except Exception as e:
-        print(f"Error in Selenium card creation: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to create card with Selenium: {str(e)}")
+        print(f"Error queueing Selenium card job: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue card job: {str(e)}")
+    print(f"Queued Selenium card job {job['job_id']} for client '{client_name}'")
+    return {"job_id": job["job_id"], "status": job["status"]}
 
-@app.get('/api/selenium/create-card/stream')
+@app.get('/api/selenium/jobs/{job_id}')
+def get_selenium_job(job_id: str = Path(..., description="Job ID returned by /api/selenium/create-card")):
+    """
+    API endpoint to poll a Selenium card job: status, progress updates and, once finished, its result.
+    """
+    job = selenium_job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    return {key: value for key, value in job.items() if key != "trace"}
+
+@app.get('/api/selenium/jobs/{job_id}/trace')
+def get_selenium_job_trace(job_id: str = Path(..., description="Job ID returned by /api/selenium/create-card")):
+    """
+    API endpoint exporting a finished Selenium card job's step timings and selector attempts as JSON.
+    """
+    job = selenium_job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    if job["trace"] is None:
+        raise HTTPException(status_code=404, detail=f"No trace for job {job_id} (still running or crashed)")
+    return {"job_id": job_id, **job["trace"]}
+
+@app.get('/api/selenium/jobs/{job_id}/result')
+def get_selenium_job_result(job_id: str = Path(..., description="Job ID returned by /api/selenium/create-card")):
+    """
+    API endpoint for a Selenium card job's result; answers 202 with the status while the job is still pending.
+    """
+    job = selenium_job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    if job["result"] is None:
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": job["status"]})
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        **job["result"],
+        "progress_updates": job["progress"]
+    }
+
+async def selenium_job_events(job_id: str, first_event: Optional[Dict[str, Any]] = None):
+    """SSE stream of a Selenium card job: progress events, heartbeats, then the result"""
+    if first_event:
+        yield f"data: {json.dumps(first_event)}\n\n"
+    async for event in selenium_job_service.stream(job_id):
+        if event is None:
+            # SSE comment line; keeps proxies from closing an idle connection
+            yield ": heartbeat\n\n"
+        else:
+            yield f"data: {json.dumps(event)}\n\n"
+
+@app.get('/api/selenium/jobs/{job_id}/events')
+def stream_selenium_job(job_id: str = Path(..., description="Job ID returned by /api/selenium/create-card")):
+    """
+    API endpoint streaming a Selenium card job's progress live as Server-Sent Events.
+    """
+    if selenium_job_service.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    return StreamingResponse(
+        selenium_job_events(job_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive"
+        }
+    )
+
+@app.post('/api/selenium/create-card/stream')
 async def create_card_with_selenium_stream(request: Request):
     """
-    Create a card using Selenium automation with streaming progress updates.
+    Queue a card creation job and stream its progress as Server-Sent Events until the result.
     """
+    data = await request.json()
+    checkout_url = data.get('checkout_url')
+    card_data = data.get('card_data', {})
+    client_name = data.get('client_name', 'Testing 1')
+
+    if not checkout_url:
+        raise HTTPException(status_code=400, detail="checkout_url is required")
+
     try:
-        # Parse request data
-        data = await request.json()
-        checkout_url = data.get('checkout_url')
-        card_data = data.get('card_data', {})
-        client_name = data.get('client_name', 'Testing 1')
-        
-        if not checkout_url:
-            raise HTTPException(status_code=400, detail="checkout_url is required")
-            
-        # Import selenium service
-        from selenium_service import selenium_service
-        
-        async def generate_progress():
-            progress_updates = []
-            
-            def progress_callback(message: str, percentage: int):
-                progress_data = {
-                    "message": message,
-                    "percentage": percentage,
-                    "timestamp": time.time()
-                }
-                progress_updates.append(progress_data)
-                yield f"data: {json.dumps(progress_data)}\n\n"
-            
-            # Set progress callback
-            selenium_service.set_progress_callback(progress_callback)
-            
-            # Run Selenium automation
-            result = await selenium_service.create_card_with_selenium(
-                checkout_url=checkout_url,
-                card_data=card_data,
-                client_name=client_name
-            )
-            
-            # Send final result
-            final_data = {
-                "type": "result",
-                "success": result["success"],
-                "message": result["message"],
-                "duration": result["duration"]
-            }
-            yield f"data: {json.dumps(final_data)}\n\n"
-        
-        return StreamingResponse(
-            generate_progress(),
-            media_type="text/plain",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "Content-Type": "text/event-stream"
-            }
-        )
-        
+        job = selenium_job_service.submit(checkout_url, card_data, client_name)
     except Exception as e:
-        print(f"Error in Selenium card creation: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to create card with Selenium: {str(e)}") 
+        print(f"Error queueing Selenium card job: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue card job: {str(e)}")
+    print(f"Queued Selenium card job {job['job_id']} for client '{client_name}' (streaming)")
+
+    return StreamingResponse(
+        selenium_job_events(job["job_id"], {"type": "queued", "job_id": job["job_id"]}),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive"
+        }
+    )
+
+@app.get('/api/selenium/browsers')
+def get_selenium_browsers():
+    """
+    API endpoint for the browsers kept by each Selenium worker: memory, age, job count and recycling.
+    """
+    return {"workers": selenium_job_service.pool_stats()}
 
 def cancel_booking_data(unique_id: str):
     """
@@ -1385,13 +2371,17 @@ def cancel_booking_data(unique_id: str):
 
 
 @app.post("/api/bookings/{unique_id}/cancel")
-async def cancel_booking(unique_id: str = Path(..., description="The booking unique ID to cancel.")):
+async def cancel_booking(
+    unique_id: str = Path(..., description="The booking unique ID to cancel."),
+    supplier_id: Optional[str] = Query(None, description="Supplier of the booking; its cached rates are invalidated. All cached rates are dropped if omitted.")
+):
     """
     API endpoint to cancel a specific booking.
     """
     print(f"Received booking cancellation request for booking: '{unique_id}'")
     try:
         data = cancel_booking_data(unique_id)
+        invalidate_supplier_rates(supplier_id)
         print(f"/api/bookings/{unique_id}/cancel result: {json.dumps(data, indent=2)}")
         return data
     except HTTPException as e:
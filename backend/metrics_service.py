@@ -0,0 +1,75 @@
+import bisect
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+# Upper bounds (milliseconds) of the histogram buckets; the last bucket is unbounded
+HISTOGRAM_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000, 30000, 60000)
+
+class Histogram:
+    """Fixed-bucket histogram of durations in milliseconds"""
+
+    def __init__(self):
+        self.counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(HISTOGRAM_BUCKETS_MS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"le_{bound}" for bound in HISTOGRAM_BUCKETS_MS] + ["inf"]
+        return {
+            "count": self.count,
+            "sum": round(self.total, 1),
+            "mean": round(self.total / self.count, 1) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+class MetricsService:
+    """In-process counters, gauges and duration histograms, exposed via /api/metrics"""
+
+    def __init__(self):
+        self._counters = defaultdict(int)
+        self._gauges: Dict[str, float] = {}
+        self._histograms = defaultdict(Histogram)
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: int = 1):
+        """Increase a counter by value"""
+        with self._lock:
+            self._counters[name] += value
+
+    def get_counter(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def set_gauge(self, name: str, value: float):
+        """Set a gauge to its current value"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value_ms: float):
+        """Record a duration in milliseconds in the named histogram"""
+        with self._lock:
+            self._histograms[name].observe(value_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a copy of all metrics"""
+        with self._lock:
+            return {
+                "counters": dict(sorted(self._counters.items())),
+                "gauges": dict(sorted(self._gauges.items())),
+                "histograms": {name: histogram.to_dict() for name, histogram in sorted(self._histograms.items())}
+            }
+
+# Global instance
+metrics_service = MetricsService()
@@ -0,0 +1,200 @@
+import os
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional
+from cache_service import TTLCache
+from fx_service import fx_service
+
+# Tri-state flag values; rate summaries do not always say whether a rate is refundable
+FLAG_UNKNOWN = -1
+FLAG_FALSE = 0
+FLAG_TRUE = 1
+
+SORT_COLUMNS = ("price", "nightly_rate", "rating", "commission")
+
+def _flag(value: Any) -> int:
+    if value is None:
+        return FLAG_UNKNOWN
+    return FLAG_TRUE if value else FLAG_FALSE
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+class RateTable:
+    """
+    Columnar store of one search session's hotels and rates. Each supplier owns one row;
+    numeric columns live in NumPy arrays so sorting and filtering are vectorized, while the
+    original rate and hotel records are kept alongside for building the response.
+    """
+
+    def __init__(self, initial_capacity: int = 64):
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._size = 0
+        self._capacity = initial_capacity
+        self.price = np.full(initial_capacity, np.nan)
+        self.nightly_rate = np.full(initial_capacity, np.nan)
+        self.commission = np.full(initial_capacity, np.nan)
+        self.rating = np.full(initial_capacity, np.nan)
+        self.refundable = np.full(initial_capacity, FLAG_UNKNOWN, dtype=np.int8)
+        self.commissionable = np.full(initial_capacity, FLAG_UNKNOWN, dtype=np.int8)
+        self.currency = np.full(initial_capacity, "", dtype=object)
+        self.supplier_ids: List[str] = []
+        self.rates: List[Optional[Dict[str, Any]]] = []
+        self.hotels: List[Optional[Dict[str, Any]]] = []
+
+    def _grow(self):
+        new_capacity = self._capacity * 2
+        for name in ("price", "nightly_rate", "commission", "rating"):
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate([column, np.full(self._capacity, np.nan)]))
+        for name in ("refundable", "commissionable"):
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate([column, np.full(self._capacity, FLAG_UNKNOWN, dtype=np.int8)]))
+        self.currency = np.concatenate([self.currency, np.full(self._capacity, "", dtype=object)])
+        self._capacity = new_capacity
+
+    def _row_for(self, supplier_id: str) -> int:
+        row = self._rows.get(supplier_id)
+        if row is None:
+            if self._size == self._capacity:
+                self._grow()
+            row = self._size
+            self._rows[supplier_id] = row
+            self.supplier_ids.append(supplier_id)
+            self.rates.append(None)
+            self.hotels.append(None)
+            self._size += 1
+        return row
+
+    def upsert_rates(self, rates: List[Dict[str, Any]]):
+        """Add or replace rate summary records (keyed by their supplier `id`)"""
+        with self._lock:
+            for rate in rates:
+                if not isinstance(rate, dict) or not rate.get("id"):
+                    continue
+                row = self._row_for(rate["id"])
+                self.rates[row] = rate
+                self.price[row] = _number(rate.get("total"))
+                self.nightly_rate[row] = _number(rate.get("nightly_rate"))
+                self.commission[row] = _number(rate.get("highest_commission"))
+                self.currency[row] = rate.get("currency") or ""
+                self.commissionable[row] = _flag(rate.get("is_commissionable"))
+                self.refundable[row] = _flag(rate.get("refundable", rate.get("is_refundable")))
+
+    def upsert_hotels(self, hotels: List[Dict[str, Any]]):
+        """Add or replace hotel records from search results (used for rating filters and display)"""
+        with self._lock:
+            for hotel in hotels:
+                if not isinstance(hotel, dict) or not hotel.get("id"):
+                    continue
+                row = self._row_for(hotel["id"])
+                self.hotels[row] = hotel
+                self.rating[row] = _number(hotel.get("average_review_rating"))
+
+    def query(
+        self,
+        sort_by: str = "price",
+        descending: bool = False,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        refundable: Optional[bool] = None,
+        commissionable: Optional[bool] = None,
+        min_rating: Optional[float] = None,
+        rated_only: bool = True,
+        page: int = 1,
+        page_size: int = 20,
+        display_currency: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Return one sorted, filtered page of rows. With `display_currency`, prices are
+        converted locally (indicative) before filtering and sorting.
+        """
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"sort_by must be one of {', '.join(SORT_COLUMNS)}")
+
+        with self._lock:
+            size = self._size
+            price = self.price[:size]
+            nightly_rate = self.nightly_rate[:size]
+            if display_currency:
+                factors = fx_service.factors(self.currency[:size], display_currency)
+                price = price * factors
+                nightly_rate = nightly_rate * factors
+            columns = {"price": price, "nightly_rate": nightly_rate, "rating": self.rating[:size], "commission": self.commission[:size]}
+            mask = np.ones(size, dtype=bool)
+            if rated_only:
+                mask &= ~np.isnan(price)
+            # NaN compares False, so rows without a price drop out of price filters
+            if min_price is not None:
+                mask &= price >= min_price
+            if max_price is not None:
+                mask &= price <= max_price
+            if refundable is not None:
+                mask &= self.refundable[:size] == _flag(refundable)
+            if commissionable is not None:
+                mask &= self.commissionable[:size] == _flag(commissionable)
+            if min_rating is not None:
+                mask &= self.rating[:size] >= min_rating
+
+            candidates = np.flatnonzero(mask)
+            keys = columns[sort_by][candidates]
+            # Missing values sort last in both directions
+            order = np.argsort(-keys if descending else keys, kind="stable")
+            ordered = candidates[order]
+
+            start = (page - 1) * page_size
+            page_rows = ordered[start:start + page_size]
+            page_rates = [self.rates[row] for row in page_rows]
+            if display_currency:
+                page_rates = fx_service.convert_rates(page_rates, display_currency)
+            results = [
+                {
+                    "id": self.supplier_ids[row],
+                    "rate": rate,
+                    "hotel": self.hotels[row]
+                }
+                for row, rate in zip(page_rows, page_rates)
+            ]
+
+        return {
+            "count": int(len(ordered)),
+            "page": page,
+            "page_size": page_size,
+            "results": results
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+class RateTableService:
+    """Keeps one RateTable per search session, expiring idle sessions"""
+
+    def __init__(self):
+        ttl_seconds = int(os.getenv("RATE_SESSION_TTL", "1800"))
+        self._sessions = TTLCache(ttl_seconds, max_entries=int(os.getenv("RATE_SESSION_MAX", "200")))
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[RateTable]:
+        return self._sessions.get(session_id)
+
+    def get_or_create(self, session_id: str) -> RateTable:
+        with self._lock:
+            table = self._sessions.get(session_id)
+            if table is None:
+                table = RateTable()
+            # Re-setting extends the session's lifetime on every write
+            self._sessions.set(session_id, table)
+            return table
+
+    def add_rates(self, session_id: str, rates: List[Dict[str, Any]]):
+        self.get_or_create(session_id).upsert_rates(rates)
+
+    def add_hotels(self, session_id: str, hotels: List[Dict[str, Any]]):
+        self.get_or_create(session_id).upsert_hotels(hotels)
+
+# Global instance
+rate_table_service = RateTableService()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the Selenium card flow.
+Serves the mock checkout page in mock_checkout/ locally and drives SeleniumCardService
+against it, reporting per-step and end-to-end latency and throughput at N parallel browsers.
+No Fora session is needed: browsers skip the cookie login.
+
+    python selenium_benchmark.py --jobs 20 --parallel 4 --iframe-delay 500
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode
+
+# The mock is served from localhost (iframes from tokenex.localhost); must be set before
+# selenium_service reads the network filter configuration
+os.environ.setdefault("SELENIUM_ALLOWED_HOSTS", "localhost:*")
+
+from browser_pool_service import BrowserPool
+from selenium_service import SeleniumCardService, launch_pooled_browser, reset_pooled_browser
+
+MOCK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_checkout")
+
+# Test card from the sample data; the mock accepts anything
+CARD_DATA = {
+    "number": "4111111111111111",
+    "cvv": "123",
+    "expiry": "12/30",
+    "name": "Benchmark User",
+    "address": "1 Main St"
+}
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def start_mock_server(port: int = 0) -> ThreadingHTTPServer:
+    """Serve mock_checkout/ on 127.0.0.1 in a background thread"""
+    handler = functools.partial(QuietHandler, directory=MOCK_DIR)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, name="mock-checkout", daemon=True).start()
+    return server
+
+def percentile(values, fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 1),
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "max": max(values)
+    }
+
+def run_job(pool: BrowserPool, checkout_url: str, client_name: str):
+    """One card run on its own service instance, as the job workers do"""
+    service = SeleniumCardService(pool=pool)
+    return asyncio.run(service.create_card_with_selenium(
+        checkout_url=checkout_url,
+        card_data=CARD_DATA,
+        client_name=client_name
+    ))
+
+def run_benchmark(jobs: int, parallel: int, checkout_url: str, client_name: str, headless: bool = True):
+    pool = BrowserPool(
+        factory=functools.partial(launch_pooled_browser, headless=headless, login=False),
+        reset=reset_pooled_browser,
+        size=parallel
+    )
+    try:
+        # Launch every browser up front so launch time is reported apart from the runs
+        warm_started = time.perf_counter()
+        pool.warm()
+        warm_seconds = time.perf_counter() - warm_started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            results = list(executor.map(lambda _: run_job(pool, checkout_url, client_name), range(jobs)))
+        wall_seconds = time.perf_counter() - started
+    finally:
+        pool.close()
+
+    succeeded = [result for result in results if result["success"]]
+    steps = {}
+    for result in succeeded:
+        for step in result["trace"]["steps"]:
+            name = f"{step['step']}.{step['field']}" if "field" in step else step["step"]
+            steps.setdefault(name, []).append(step["duration_ms"])
+    fallbacks = {}
+    for result in results:
+        for group, misses in result["trace"]["fallbacks"].items():
+            fallbacks[group] = fallbacks.get(group, 0) + misses
+
+    return {
+        "jobs": jobs,
+        "parallel": parallel,
+        "succeeded": len(succeeded),
+        "failures": sorted({result["message"] for result in results if not result["success"]}),
+        "browser_launch_seconds": round(warm_seconds, 2),
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput_per_minute": round(len(succeeded) / wall_seconds * 60, 1) if wall_seconds else None,
+        "end_to_end_ms": summarize([result["trace"]["total_ms"] for result in succeeded]) if succeeded else None,
+        "steps_ms": {name: summarize(durations) for name, durations in steps.items()},
+        "selector_fallbacks": fallbacks
+    }
+
+def print_report(report):
+    print()
+    print(f"Jobs: {report['succeeded']}/{report['jobs']} succeeded with {report['parallel']} parallel browsers")
+    for failure in report["failures"]:
+        print(f"  ❌ {failure}")
+    print(f"Browser launch: {report['browser_launch_seconds']}s, runs: {report['wall_seconds']}s")
+    print(f"Throughput: {report['throughput_per_minute']} cards/minute")
+    if report["end_to_end_ms"]:
+        end_to_end = report["end_to_end_ms"]
+        print(f"End to end: mean {end_to_end['mean']}ms, p50 {end_to_end['p50']}ms, p95 {end_to_end['p95']}ms, max {end_to_end['max']}ms")
+    print()
+    print(f"{'step':<44}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'max':>10}")
+    for name, stats in report["steps_ms"].items():
+        print(f"{name:<44}{stats['count']:>7}{stats['mean']:>10}{stats['p50']:>10}{stats['p95']:>10}{stats['max']:>10}")
+    if report["selector_fallbacks"]:
+        print()
+        print("Selector fallbacks: " + ", ".join(f"{group}={misses}" for group, misses in sorted(report["selector_fallbacks"].items())))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Selenium card flow against a local mock checkout page")
+    parser.add_argument("--jobs", type=int, default=10, help="card runs in total")
+    parser.add_argument("--parallel", type=int, default=1, help="browsers running at the same time")
+    parser.add_argument("--iframe-delay", type=int, default=500, help="ms before each card iframe is ready")
+    parser.add_argument("--submit-delay", type=int, default=300, help="ms between submit and the success toast")
+    parser.add_argument("--client", default="Testing 1", help="client to pick on the checkout page")
+    parser.add_argument("--port", type=int, default=0, help="port for the mock page (random when 0)")
+    parser.add_argument("--headed", action="store_true", help="show the browsers")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    server = start_mock_server(args.port)
+    query = urlencode({"iframe_delay": args.iframe_delay, "submit_delay": args.submit_delay})
+    checkout_url = f"http://localhost:{server.server_address[1]}/index.html?{query}"
+    print(f"Mock checkout at {checkout_url}")
+    try:
+        report = run_benchmark(args.jobs, args.parallel, checkout_url, args.client, headless=not args.headed)
+    except Exception as e:
+        print(f"❌ Benchmark failed: {e}")
+        sys.exit(1)
+    finally:
+        server.shutdown()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2)
+        print(f"Report written to {args.json}")
+
+if __name__ == "__main__":
+    main()
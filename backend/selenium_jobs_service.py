@@ -0,0 +1,338 @@
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import threading
+import multiprocessing
+from multiprocessing import util
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Dict, Optional
+from dotenv import load_dotenv
+from cache_service import TTLCache
+from metrics_service import metrics_service
+
+load_dotenv()
+
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SELENIUM_SSE_HEARTBEAT_SECONDS", "15"))
+# Directory to write each job's trace to as <job_id>.json (disabled when empty)
+TRACE_DIR = os.getenv("SELENIUM_TRACE_DIR", "")
+
+def metric_label(text: str) -> str:
+    """Reduce free text (e.g. a selector group like 'iframe:card-tokenex-element') to a metric name part"""
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+# Queue for progress events, set in each worker process by _init_worker
+_worker_events = None
+
+def _init_worker(events):
+    """Runs once in every worker process: resolve chromedriver and warm this worker's browsers"""
+    global _worker_events
+    _worker_events = events
+    from selenium_service import browser_pool, resolve_chromedriver
+    # Quit this worker's browsers when the worker process exits
+    util.Finalize(None, browser_pool.close, exitpriority=10)
+    # Browser memory and recycling stats go to the API process on the event queue
+    worker_pid = os.getpid()
+    browser_pool.start_watchdog(lambda stats: events.put((None, {"type": "pool_stats", "worker_pid": worker_pid, **stats})))
+    try:
+        resolve_chromedriver()
+        if os.getenv("SELENIUM_POOL_WARM_ON_STARTUP", "true").lower() == "true":
+            browser_pool.warm()
+    except Exception as e:
+        print(f"Selenium worker warm-up failed, browsers will launch on first job: {e}")
+
+def _warm_up():
+    """No-op job submitted at startup so worker processes start before the first real job"""
+    return os.getpid()
+
+def _run_card_job(job_id: str, checkout_url: str, card_data: Dict[str, str], client_name: str) -> Dict[str, Any]:
+    """Worker process entry point for one card job"""
+    from selenium_service import run_card_job
+
+    def progress_callback(message: str, percentage: int):
+        _worker_events.put((job_id, {
+            "type": "progress",
+            "message": message,
+            "percentage": percentage,
+            "timestamp": time.time()
+        }))
+
+    _worker_events.put((job_id, {"type": "started", "timestamp": time.time()}))
+    result = run_card_job(checkout_url, card_data, client_name, progress_callback)
+    # Sent on the progress queue so it arrives after every progress event of the job
+    _worker_events.put((job_id, {"type": "result", **result}))
+    return result
+
+class SeleniumJobService:
+    """
+    Runs Selenium card jobs in SELENIUM_WORKERS separate processes, so blocking WebDriver
+    calls never touch the API's event loop. Each worker runs one job at a time and keeps
+    its own browsers, so the worker count caps both parallel runs and memory; it defaults
+    to 2. Jobs are tracked in memory by job ID; progress reported by the workers is streamed
+    back over a multiprocessing queue and fanned out to per-job asyncio queues for live
+    subscribers.
+    """
+
+    def __init__(self):
+        self.workers = int(os.getenv("SELENIUM_WORKERS", "2"))
+        self._jobs = TTLCache(int(os.getenv("SELENIUM_JOB_TTL", "3600")), max_entries=1000)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._events = None
+        self._listener: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # job_id -> [(event loop, asyncio.Queue)] of live stream subscribers
+        self._subscribers: Dict[str, list] = {}
+        self._events_lock = threading.Lock()
+        # worker pid -> latest browser pool stats reported by that worker
+        self._pool_stats: Dict[int, Dict[str, Any]] = {}
+
+    def start(self):
+        """Start the worker processes and the thread that collects their progress events"""
+        with self._lock:
+            if self._executor is not None:
+                return
+            executor = self._create_executor()
+        self._warm(executor)
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        """Create the worker pool, its event queue and the listener thread (call with _lock held)"""
+        # spawn keeps workers free of the API process's threads and sockets (and matches Windows)
+        context = multiprocessing.get_context("spawn")
+        self._events = context.Queue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self._events,)
+        )
+        self._listener = threading.Thread(target=self._collect_events, name="selenium-events", daemon=True)
+        self._listener.start()
+        return self._executor
+
+    def _warm(self, executor: ProcessPoolExecutor):
+        try:
+            for _ in range(self.workers):
+                executor.submit(_warm_up)
+        except BrokenProcessPool:
+            pass
+
+    def _rebuild(self, broken: ProcessPoolExecutor):
+        """
+        Replace a worker pool that broke because a worker process died (OOM kill, Chrome
+        taking the worker down). A broken ProcessPoolExecutor rejects every later job.
+        """
+        with self._lock:
+            if self._executor is not broken:
+                # Already rebuilt by another caller, or the service was stopped
+                return
+            print("A Selenium worker process died; restarting the worker pool")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._events.put(None)
+            executor = self._create_executor()
+        with self._events_lock:
+            self._pool_stats.clear()
+        metrics_service.increment("selenium.worker_pool_restarts")
+        self._warm(executor)
+
+    def stop(self):
+        with self._lock:
+            if self._executor is None:
+                return
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._events.put(None)
+            self._executor = None
+        with self._events_lock:
+            self._pool_stats.clear()
+
+    def _collect_events(self):
+        events = self._events
+        while True:
+            item = events.get()
+            if item is None:
+                return
+            job_id, event = item
+            if job_id is None:
+                if event["type"] == "pool_stats":
+                    self._record_pool_stats(event)
+                continue
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
+            if event["type"] == "started":
+                if job["status"] == "queued":
+                    job["status"] = "running"
+                job["started_at"] = event["timestamp"]
+            elif event["type"] == "result":
+                self._complete(job, {key: value for key, value in event.items() if key != "type"})
+            else:
+                with self._events_lock:
+                    job["progress"].append(event)
+                    self._publish(job_id, event)
+
+    def _record_pool_stats(self, stats: Dict[str, Any]):
+        """Keep a worker's latest pool stats and update the browser gauges across all workers"""
+        stats = {key: value for key, value in stats.items() if key != "type"}
+        stats["reported_at"] = time.time()
+        with self._events_lock:
+            self._pool_stats[stats["worker_pid"]] = stats
+            workers = list(self._pool_stats.values())
+
+        browsers = [browser for worker in workers for browser in worker["browser_stats"]]
+        rss = [browser["rss_mb"] for browser in browsers if browser["rss_mb"] is not None]
+        metrics_service.set_gauge("selenium.browsers", len(browsers))
+        metrics_service.set_gauge("selenium.browsers_rss_mb", round(sum(rss), 1))
+        metrics_service.set_gauge("selenium.browser_rss_mb_max", max(rss) if rss else 0)
+        recycled = {}
+        for worker in workers:
+            for reason, count in worker["recycled"].items():
+                recycled[reason] = recycled.get(reason, 0) + count
+        for reason, count in recycled.items():
+            metrics_service.set_gauge(f"selenium.browsers_recycled.{reason}", count)
+
+    def pool_stats(self) -> list:
+        """Latest browser pool stats of each worker process"""
+        with self._events_lock:
+            return [dict(stats) for _, stats in sorted(self._pool_stats.items())]
+
+    def _publish(self, job_id: str, event: Dict[str, Any]):
+        """Hand an event to every live subscriber of the job (call with _events_lock held)"""
+        for loop, queue in self._subscribers.get(job_id, ()):
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    def _complete(self, job: Dict[str, Any], result: Dict[str, Any]):
+        result = dict(result)
+        trace = result.pop("trace", None)
+        with self._events_lock:
+            if job["result"] is not None:
+                return
+            job["trace"] = trace
+            job["result"] = result
+            job["status"] = "succeeded" if result.get("success") else "failed"
+            job["finished_at"] = time.time()
+            self._publish(job["job_id"], {"type": "result", **result})
+        metrics_service.increment(f"selenium.jobs_{job['status']}")
+        if trace:
+            self._record_trace(job["job_id"], trace)
+
+    def _record_trace(self, job_id: str, trace: Dict[str, Any]):
+        """Aggregate a job's trace into the metrics histograms and optionally export it"""
+        metrics_service.observe("selenium.job_total_ms", trace["total_ms"])
+        for step in trace["steps"]:
+            name = f"{step['step']}.{step['field']}" if "field" in step else step["step"]
+            metrics_service.observe(f"selenium.step.{name}_ms", step["duration_ms"])
+        # Selectors are named by their position in the group's fallback list; the full
+        # selector text is only kept in the exported trace
+        for attempt in trace["selectors"]:
+            metrics_service.observe(f"selenium.selector.{metric_label(attempt['group'])}.{attempt['index']}_ms", attempt["duration_ms"])
+        for group, misses in trace["fallbacks"].items():
+            metrics_service.increment(f"selenium.selector_fallbacks.{metric_label(group)}", misses)
+
+        if TRACE_DIR:
+            try:
+                os.makedirs(TRACE_DIR, exist_ok=True)
+                with open(os.path.join(TRACE_DIR, f"{job_id}.json"), "w", encoding="utf-8") as trace_file:
+                    json.dump({"job_id": job_id, **trace}, trace_file, indent=2)
+            except OSError as e:
+                print(f"Could not write trace for job {job_id}: {e}")
+
+    def submit(self, checkout_url: str, card_data: Dict[str, str], client_name: str) -> Dict[str, Any]:
+        """Queue a card job; returns its public record (card data is never stored on it)"""
+        if self._executor is None:
+            self.start()
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "client_name": client_name,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "progress": [],
+            "result": None,
+            "trace": None
+        }
+        self._jobs.set(job_id, job)
+        executor = self._executor
+        try:
+            future = executor.submit(_run_card_job, job_id, checkout_url, card_data, client_name)
+        except BrokenProcessPool:
+            # A worker died since the last job; retry once on a fresh pool
+            self._rebuild(executor)
+            executor = self._executor
+            try:
+                if executor is None:
+                    raise RuntimeError("Selenium workers are stopped")
+                future = executor.submit(_run_card_job, job_id, checkout_url, card_data, client_name)
+            except Exception as e:
+                self._complete(job, {"success": False, "message": f"Card job could not be queued: {e}"})
+                raise
+        future.add_done_callback(lambda done: self._finish(job_id, done, executor))
+        metrics_service.increment("selenium.jobs_submitted")
+        return job
+
+    def _finish(self, job_id: str, future, executor: ProcessPoolExecutor):
+        """Record jobs that ended without reporting a result (worker crash, shutdown)"""
+        job = self._jobs.get(job_id)
+        if job is None or future.cancelled():
+            if job is not None:
+                self._complete(job, {"success": False, "message": "Card job was cancelled"})
+            return
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            # Every job queued on the dead pool fails here; the first one rebuilds the pool.
+            # This callback runs on the broken pool's management thread, so the rebuild
+            # happens on its own thread.
+            self._complete(job, {"success": False, "message": "Card job failed: a Selenium worker process died"})
+            threading.Thread(target=self._rebuild, args=(executor,), name="selenium-rebuild", daemon=True).start()
+        elif error is not None:
+            self._complete(job, {"success": False, "message": f"Card job failed: {error}"})
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._jobs.get(job_id)
+
+    async def stream(self, job_id: str) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield a job's progress events live, replaying those already recorded, and finally
+        its result event. Yields None whenever SSE_HEARTBEAT_SECONDS pass without an event.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        subscriber = (loop, queue)
+        with self._events_lock:
+            backlog = list(job["progress"])
+            finished = job["result"] is not None
+            if finished:
+                backlog.append({"type": "result", **job["result"]})
+            else:
+                self._subscribers.setdefault(job_id, []).append(subscriber)
+
+        try:
+            for event in backlog:
+                yield event
+            if finished:
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event.get("type") == "result":
+                    return
+        finally:
+            with self._events_lock:
+                subscribers = self._subscribers.get(job_id, [])
+                if subscriber in subscribers:
+                    subscribers.remove(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(job_id, None)
+
+# Global instance
+selenium_job_service = SeleniumJobService()
@@ -1,26 +1,218 @@
 import time
 import json
+import shutil
+import calendar
 import asyncio
-from typing import Dict, Optional, Callable
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Callable
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 from selenium.webdriver.common.action_chains import ActionChains
 from webdriver_manager.chrome import ChromeDriverManager
+from browser_pool_service import BrowserPool, PooledBrowser
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Timeouts (seconds) for the explicit waits that replace fixed sleeps
+IFRAME_READY_TIMEOUT = float(os.getenv("SELENIUM_IFRAME_READY_TIMEOUT", "10"))
+FIELD_VALUE_TIMEOUT = float(os.getenv("SELENIUM_FIELD_VALUE_TIMEOUT", "2"))
+SUBMIT_RESULT_TIMEOUT = float(os.getenv("SELENIUM_SUBMIT_RESULT_TIMEOUT", "15"))
+
+# Toast/alert containers; their text tells a success message from an error
+_TOAST_XPATH = (
+    "//*[@role='alert' or @role='status' or contains(@class, 'toast') or contains(@class, 'Toast')"
+    " or contains(@class, 'notification') or contains(@class, 'snackbar')]"
+)
+# The element's text lowercased, with punctuation turned into spaces and padded with a space on
+# each side, so contains(..., ' not ') only matches the whole word
+_WORDS = (
+    "concat(' ', translate(normalize-space(.), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ.,;:!?',"
+    " 'abcdefghijklmnopqrstuvwxyz      '), ' ')"
+)
+_NEGATIVE_WORDING = (
+    f"contains({_WORDS}, ' not ') or contains({_WORDS}, \"n't\") or contains({_WORDS}, \"n’t\")"
+    f" or contains({_WORDS}, 'fail') or contains({_WORDS}, 'error') or contains({_WORDS}, 'unable') or contains({_WORDS}, 'unsuccessful')"
+    f" or contains({_WORDS}, 'declined') or contains({_WORDS}, 'invalid')"
+)
+# Fora confirms with "Card added successfully"; other wordings of a completed save are accepted
+# as long as nothing in the message is negative ("Card could not be added")
+SUCCESS_TOAST_XPATH = (
+    _TOAST_XPATH
+    + f"[contains({_WORDS}, ' card added ') or contains({_WORDS}, ' card saved ') or contains({_WORDS}, ' card created ')"
+    f" or contains({_WORDS}, ' success ') or contains({_WORDS}, ' successfully ')]"
+    + f"[not({_NEGATIVE_WORDING})]"
+)
+ERROR_TOAST_XPATH = _TOAST_XPATH + f"[{_NEGATIVE_WORDING}]"
+# Title of the add-card modal; the modal has closed once it is no longer displayed
+CARD_FORM_XPATH = "//div[contains(text(), 'Add payment card')]"
+
+# Counts postMessage events from TokenEx iframes; TokenEx posts one when a field has loaded
+TOKENEX_READY_LISTENER = """
+if (!window.__tokenexListener) {
+    window.__tokenexListener = true;
+    window.__tokenexReady = 0;
+    window.addEventListener('message', function (event) {
+        if (String(event.origin).indexOf('tokenex') !== -1) { window.__tokenexReady += 1; }
+    });
+}
+"""
+
+FORA_URL = "https://advisor.fora.travel/"
+SESSION_COOKIE_NAME = "__Secure-next-auth.session-token"
+
+def session_cookie_params(state: Dict[str, Any]) -> list:
+    """DevTools cookie parameters that log a browser in to the advisor site"""
+    expires = state.get("expires")
+    session_cookie = {
+        "name": SESSION_COOKIE_NAME,
+        "value": state["cookies"].get(SESSION_COOKIE_NAME, ""),
+        "url": FORA_URL,
+        "path": "/",
+        "secure": True,
+        "httpOnly": True,
+        "sameSite": "Lax"
+    }
+    if expires:
+        # Chrome drops the cookie when the session expires; it is set again after a refresh
+        session_cookie["expires"] = calendar.timegm(expires.timetuple())
+    return [
+        {"name": "__Host-next-auth.csrf-token",
+         "value": "ec33bcaa8b2f1045ac136c03c1d4e832bc3b0747dfbd52246d74168272b19ba7%7C6ba40c70eb96f6ec545a4ef17d8597c5f1d3fc3692d653d802ed1e66b4d29657",
+         "url": FORA_URL, "path": "/", "secure": True, "httpOnly": True, "sameSite": "Lax"},
+        {"name": "__Secure-next-auth.callback-url",
+         "value": "https%3A%2F%2Fadvisor.fora.travel%2F%2F",
+         "url": FORA_URL, "path": "/", "secure": True, "sameSite": "Lax"},
+        session_cookie
+    ]
+
+def session_version(state: Dict[str, Any]):
+    """Identifies a login: a browser holding another version needs its cookies set again"""
+    return state["cookies"].get(SESSION_COOKIE_NAME), state.get("expires")
+
+def apply_session_state(driver, state: Dict[str, Any]):
+    """
+    Give a browser the login cookies. They are set through DevTools, which needs no page
+    load; browsers that reject that get them the old way, by loading the site first.
+    """
+    cookies = session_cookie_params(state)
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+    except Exception as e:
+        print(f"Could not set cookies via DevTools, loading the site to set them: {e}")
+        driver.get(FORA_URL)
+        for cookie in cookies:
+            driver.add_cookie({"name": cookie["name"], "value": cookie["value"], "path": "/"})
+    driver.session_version = session_version(state)
+
+def refresh_browser_session(driver) -> bool:
+    """Set the login cookies again if the session changed or expired since the browser got them"""
+    from auth_service import auth_service
+    state = auth_service.get_session_state()
+    if getattr(driver, "session_version", None) == session_version(state):
+        return False
+    apply_session_state(driver, state)
+    return True
+
+# Network filter applied through Chrome DevTools: only these hosts (and their subdomains) may
+# load, and URLs matching the blocked patterns never load even from allowed hosts
+ALLOWED_HOSTS = [host.strip() for host in os.getenv("SELENIUM_ALLOWED_HOSTS", "fora.travel,tokenex.com").split(",") if host.strip()]
+BLOCKED_URL_PATTERNS = [
+    pattern.strip() for pattern in os.getenv(
+        "SELENIUM_BLOCKED_URLS",
+        "*://*/*.woff,*://*/*.woff2,*://*/*.ttf,*://*/*.otf,*://*/*.png,*://*/*.jpg,*://*/*.jpeg,*://*/*.gif,*://*/*.webp,*://*/*.mp4"
+    ).split(",") if pattern.strip()
+]
+
+def network_block_patterns(allowed_hosts, blocked_patterns):
+    """
+    Ordered Network.setBlockedURLs patterns (URLPattern syntax, first match wins): blocked
+    patterns, then the allowed hosts, then everything else blocked. Without allowed hosts
+    only the blocked patterns apply.
+    """
+    patterns = [{"urlPattern": pattern, "block": True} for pattern in blocked_patterns]
+    for host in allowed_hosts:
+        patterns.append({"urlPattern": f"*://{host}/*", "block": False})
+        patterns.append({"urlPattern": f"*://*.{host}/*", "block": False})
+    if allowed_hosts:
+        patterns.append({"urlPattern": "*://*/*", "block": True})
+    return patterns
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+def resolve_chromedriver() -> str:
+    """
+    Path of the chromedriver binary, resolved once per process: CHROMEDRIVER_PATH if set,
+    else a chromedriver on PATH, else webdriver-manager. Only the last one needs network
+    access, so offline hosts should set CHROMEDRIVER_PATH or put chromedriver on PATH.
+    """
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            configured = os.getenv("CHROMEDRIVER_PATH")
+            if configured:
+                if not os.path.isfile(configured):
+                    raise FileNotFoundError(f"CHROMEDRIVER_PATH does not exist: {configured}")
+                path = configured
+            else:
+                path = shutil.which("chromedriver") or ChromeDriverManager().install()
+            print(f"Using chromedriver: {path}")
+            _chromedriver_path = path
+        return _chromedriver_path
+
 class SeleniumCardService:
-    def __init__(self):
+    """
+    One card automation run. Create a new instance per job: the driver handle, wait object
+    and progress callback all belong to that run, so concurrent runs cannot interfere.
+    """
+
+    def __init__(self, progress_callback: Optional[Callable[[str, int], None]] = None, pool: Optional[BrowserPool] = None):
         self.driver = None
         self.wait = None
-        self.progress_callback = None
+        self.progress_callback = progress_callback
+        # Where runs get their browser; None means the process-wide browser_pool
+        self.pool = pool
+        self._started = time.perf_counter()
+        # Step timings and selector attempts of this run, exported as the job's trace
+        self.trace: Dict[str, Any] = {"steps": [], "selectors": [], "fallbacks": {}}
+
+    def _elapsed_ms(self, since: float) -> float:
+        return round((time.perf_counter() - since) * 1000, 1)
+
+    @contextmanager
+    def step(self, name: str, **details):
+        """Record how long a step of the run takes and whether it succeeded"""
+        started = time.perf_counter()
+        entry = {"step": name, **details, "start_ms": self._elapsed_ms(self._started)}
+        try:
+            yield
+            entry["ok"] = True
+        except BaseException:
+            entry["ok"] = False
+            raise
+        finally:
+            entry["duration_ms"] = self._elapsed_ms(started)
+            self.trace["steps"].append(entry)
+
+    def record_selector(self, group: str, selector: str, started: float, found: bool, index: int):
+        """Record one selector attempt (index = its position in the group's fallback list); every miss counts as a fallback"""
+        self.trace["selectors"].append({
+            "group": group,
+            "index": index,
+            "selector": selector,
+            "found": found,
+            "duration_ms": self._elapsed_ms(started)
+        })
+        if not found:
+            self.trace["fallbacks"][group] = self.trace["fallbacks"].get(group, 0) + 1
         
     def set_progress_callback(self, callback: Callable[[str, int], None]):
         """Set callback for progress updates"""
@@ -63,16 +255,37 @@ class SeleniumCardService:
             options.add_argument("--headless")
             options.add_argument("--blink-settings=imagesEnabled=false")
         
-        # Use webdriver-manager to automatically download and manage ChromeDriver
-        service = Service(ChromeDriverManager().install())
+        # The driver binary is resolved once per process, not per job
+        service = Service(resolve_chromedriver())
         self.driver = webdriver.Chrome(service=service, options=options)
         
         # Set window size for better compatibility
         self.driver.set_window_size(1920, 1080)
         
         self.wait = WebDriverWait(self.driver, 20)
+
+        with self.step("apply_network_filter"):
+            self.apply_network_filter()
         
         self.update_progress("Chrome driver ready", 10)
+
+    def apply_network_filter(self):
+        """Block third-party and heavy resources via DevTools so only Fora and TokenEx load"""
+        patterns = network_block_patterns(ALLOWED_HOSTS, BLOCKED_URL_PATTERNS)
+        self.trace["network_filter"] = {
+            "allowed_hosts": ALLOWED_HOSTS,
+            "blocked_patterns": BLOCKED_URL_PATTERNS,
+            "enabled": False
+        }
+        if not patterns:
+            return
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urlPatterns": patterns})
+            self.trace["network_filter"]["enabled"] = True
+        except Exception as e:
+            # Chrome versions without urlPatterns support reject the call; run unfiltered
+            print(f"Could not apply network filter, loading all resources: {e}")
         
     def login_with_cookies(self) -> bool:
         """Login using session cookies from auth_service"""
@@ -81,29 +294,14 @@ class SeleniumCardService:
         try:
             # Get session cookies from auth_service
             from auth_service import auth_service
-            session_cookies = auth_service.get_session_cookies()
+            state = auth_service.get_session_state()
             
-            if not session_cookies:
+            if not state["cookies"].get(SESSION_COOKIE_NAME):
                 raise ValueError("No session cookies available")
-                
-            cookies = [
-                {"name": "__Host-next-auth.csrf-token",
-                 "value": "ec33bcaa8b2f1045ac136c03c1d4e832bc3b0747dfbd52246d74168272b19ba7%7C6ba40c70eb96f6ec545a4ef17d8597c5f1d3fc3692d653d802ed1e66b4d29657",
-                 "path": "/"},
-                {"name": "__Secure-next-auth.callback-url", 
-                 "value": "https%3A%2F%2Fadvisor.fora.travel%2F%2F", 
-                 "path": "/"},
-                {"name": "__Secure-next-auth.session-token", 
-                 "value": session_cookies.get('__Secure-next-auth.session-token', ''), 
-                 "path": "/"}
-            ]
-
-            self.update_progress("Loading home page...", 20)
-            self.driver.get("https://advisor.fora.travel")
 
+            # Set before the first navigation, so no page has to be loaded just to log in
             self.update_progress("Injecting login cookies...", 25)
-            for cookie in cookies:
-                self.driver.add_cookie(cookie)
+            apply_session_state(self.driver, state)
                 
             self.update_progress("Login successful", 30)
             return True
@@ -159,15 +357,18 @@ class SeleniumCardService:
         add_card_button = self.wait.until(
             EC.element_to_be_clickable((By.XPATH, "//button[.//span[text()='Add card']]"))
         )
+        # Listen for the iframes' ready messages before they start loading
+        self.driver.execute_script(TOKENEX_READY_LISTENER)
         add_card_button.click()
 
         self.wait.until(
-            EC.visibility_of_element_located((By.XPATH, "//div[contains(text(), 'Add payment card')]"))
+            EC.visibility_of_element_located((By.XPATH, CARD_FORM_XPATH))
         )
         
         # Wait for TokenEx iframes to load
         self.update_progress("Loading iframes...", 52)
-        time.sleep(3)  # Give TokenEx iframes time to load
+        with self.step("wait_for_tokenex_iframes"):
+            self.wait_for_tokenex_iframes()
         
         # Check if TokenEx iframes are present
         try:
@@ -178,6 +379,33 @@ class SeleniumCardService:
         
         self.update_progress("Card form opened", 55)
         
+    def wait_for_tokenex_iframes(self, expected: int = 2):
+        """
+        Wait until the card number and CVV iframes have posted their ready messages. If the
+        messages never arrive, carry on once the iframes exist; filling waits for the inputs.
+        """
+        def iframes_ready(driver):
+            ready = driver.execute_script("return window.__tokenexReady || 0;")
+            return ready >= expected
+
+        try:
+            WebDriverWait(self.driver, IFRAME_READY_TIMEOUT, poll_frequency=0.1).until(iframes_ready)
+        except TimeoutException:
+            self.update_progress("No iframe ready messages, waiting for iframes to appear", 53)
+            WebDriverWait(self.driver, IFRAME_READY_TIMEOUT, poll_frequency=0.1).until(
+                lambda driver: len(driver.find_elements(By.CSS_SELECTOR, "iframe[src*='tokenex']")) >= expected
+            )
+
+    def wait_for_value(self, field, text: str) -> bool:
+        """Wait until an input holds the expected value; False if it does not within FIELD_VALUE_TIMEOUT"""
+        try:
+            WebDriverWait(self.driver, FIELD_VALUE_TIMEOUT, poll_frequency=0.05).until(
+                lambda _: field.get_attribute('value') == text
+            )
+            return True
+        except TimeoutException:
+            return False
+
     def fill_iframe_field(self, container_id: str, text: str):
         """Fill a field in a TokenEx iframe"""
         self.update_progress(f"Filling {container_id}...", 60)
@@ -192,15 +420,18 @@ class SeleniumCardService:
             ]
             
             iframe_found = False
-            for selector in iframe_selectors:
+            for index, selector in enumerate(iframe_selectors):
+                attempt_started = time.perf_counter()
                 try:
                     self.update_progress(f"Trying iframe selector: {selector}", 60)
                     iframe = self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
                     self.driver.switch_to.frame(iframe)
+                    self.record_selector(f"iframe:{container_id}", selector, attempt_started, True, index)
                     self.update_progress(f"Found iframe with: {selector}", 61)
                     iframe_found = True
                     break
                 except TimeoutException:
+                    self.record_selector(f"iframe:{container_id}", selector, attempt_started, False, index)
                     self.update_progress(f"Iframe selector failed: {selector}", 60)
                     continue
             
@@ -218,7 +449,8 @@ class SeleniumCardService:
             ]
             
             field_filled = False
-            for selector in selectors:
+            for index, selector in enumerate(selectors):
+                attempt_started = time.perf_counter()
                 try:
                     self.update_progress(f"Trying input selector: {selector}", 62)
                     field = WebDriverWait(self.driver, 3).until(
@@ -227,24 +459,24 @@ class SeleniumCardService:
                     
                     # Clear the field first
                     field.clear()
-                    time.sleep(0.5)  # Wait a bit after clearing
                     
                     # Use JavaScript to set the value (more reliable for iframes)
                     self.driver.execute_script("arguments[0].value = arguments[1];", field, text)
-                    time.sleep(0.5)  # Wait a bit after setting value
                     
                     # Verify the value was set correctly
-                    actual_value = field.get_attribute('value')
-                    if actual_value != text:
+                    if not self.wait_for_value(field, text):
                         # If JavaScript didn't work, try sending keys
                         field.clear()
                         field.send_keys(text)
-                        time.sleep(0.5)
+                        if not self.wait_for_value(field, text):
+                            self.update_progress(f"Value of {container_id} could not be confirmed", 62)
                     
                     field_filled = True
+                    self.record_selector(f"input:{container_id}", selector, attempt_started, True, index)
                     self.update_progress(f"Filled {container_id} using input selector: {selector}", 63)
                     break
                 except (NoSuchElementException, TimeoutException):
+                    self.record_selector(f"input:{container_id}", selector, attempt_started, False, index)
                     self.update_progress(f"Input selector failed: {selector}", 62)
                     continue
 
@@ -265,8 +497,10 @@ class SeleniumCardService:
         
         try:
             # Fill TokenEx iframe fields
-            self.fill_iframe_field("card-tokenex-element", card_data["number"])
-            self.fill_iframe_field("cvv-tokenex-element", card_data["cvv"])
+            with self.step("fill_iframe_field", field="card-tokenex-element"):
+                self.fill_iframe_field("card-tokenex-element", card_data["number"])
+            with self.step("fill_iframe_field", field="cvv-tokenex-element"):
+                self.fill_iframe_field("cvv-tokenex-element", card_data["cvv"])
             
             # Fill expiry date
             try:
@@ -328,15 +562,18 @@ class SeleniumCardService:
                 ]
                 
                 city_input = None
-                for selector in city_selectors:
+                for index, selector in enumerate(city_selectors):
+                    attempt_started = time.perf_counter()
                     try:
                         self.update_progress(f"Trying city selector: {selector}", 81)
                         city_input = self.wait.until(
                             EC.element_to_be_clickable((By.XPATH, selector))
                         )
+                        self.record_selector("city", selector, attempt_started, True, index)
                         self.update_progress(f"Found city field with: {selector}", 82)
                         break
                     except TimeoutException:
+                        self.record_selector("city", selector, attempt_started, False, index)
                         self.update_progress(f"City selector failed: {selector}", 81)
                         continue
                 
@@ -358,15 +595,18 @@ class SeleniumCardService:
                 ]
                 
                 state_input = None
-                for selector in state_selectors:
+                for index, selector in enumerate(state_selectors):
+                    attempt_started = time.perf_counter()
                     try:
                         self.update_progress(f"Trying state selector: {selector}", 83)
                         state_input = self.wait.until(
                             EC.element_to_be_clickable((By.XPATH, selector))
                         )
+                        self.record_selector("state", selector, attempt_started, True, index)
                         self.update_progress(f"Found state field with: {selector}", 84)
                         break
                     except TimeoutException:
+                        self.record_selector("state", selector, attempt_started, False, index)
                         self.update_progress(f"State selector failed: {selector}", 83)
                         continue
                 
@@ -392,15 +632,18 @@ class SeleniumCardService:
                 ]
                 
                 zip_input = None
-                for selector in zip_selectors:
+                for index, selector in enumerate(zip_selectors):
+                    attempt_started = time.perf_counter()
                     try:
                         self.update_progress(f"Trying zip selector: {selector}", 85)
                         zip_input = self.wait.until(
                             EC.element_to_be_clickable((By.XPATH, selector))
                         )
+                        self.record_selector("zip", selector, attempt_started, True, index)
                         self.update_progress(f"Found zip field with: {selector}", 86)
                         break
                     except TimeoutException:
+                        self.record_selector("zip", selector, attempt_started, False, index)
                         self.update_progress(f"Zip selector failed: {selector}", 85)
                         continue
                 
@@ -465,8 +708,11 @@ class SeleniumCardService:
     
     # Removed take_screenshot method
     
-    def submit_form(self):
-        """Submit the card form"""
+    def submit_form(self) -> Optional[str]:
+        """
+        Submit the card form; returns the outcome ('toast', 'closed' or None if unclear).
+        Raises if the page answers with an error message.
+        """
         self.update_progress("Submitting form...", 90)
         
         try:
@@ -480,97 +726,104 @@ class SeleniumCardService:
             ]
             
             submit_button = None
-            for selector in submit_button_selectors:
+            for index, selector in enumerate(submit_button_selectors):
+                attempt_started = time.perf_counter()
                 try:
                     submit_button = self.wait.until(
                         EC.element_to_be_clickable((By.XPATH, selector))
                     )
+                    self.record_selector("submit", selector, attempt_started, True, index)
                     break
                 except TimeoutException:
+                    self.record_selector("submit", selector, attempt_started, False, index)
                     continue
             
             if not submit_button:
                 raise Exception("Could not find submit button")
             
-            # Scroll to the button to ensure it's visible
+            # Scroll to the button and wait until it can take the click
             self.driver.execute_script("arguments[0].scrollIntoView(true);", submit_button)
-            time.sleep(1)
+            submit_button = self.wait.until(EC.element_to_be_clickable(submit_button))
+            # A modal that closes only says something if it was there to begin with
+            modal_seen = bool(self.driver.find_elements(By.XPATH, CARD_FORM_XPATH))
             
             # Click the submit button
             submit_button.click()
             self.update_progress("Form submitted", 92)
             
-            # Wait for the form to be processed
-            time.sleep(3)
-            
             # Take screenshot after form submission
             # self.take_screenshot("after_form_submitted") # Removed screenshot
             
-            # Check if there's a success message or if the modal closed
-            try:
-                success_message = self.wait.until(
-                    EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'success') or contains(text(), 'added') or contains(text(), 'created') or contains(text(), 'saved')]"))
-                )
+            # Wait for a success message, an error message or for the modal to close
+            outcome = self.wait_for_submit_result(modal_seen)
+            if outcome == "error":
+                message = self._visible_text(self.driver, ERROR_TOAST_XPATH) or "error message shown"
+                raise Exception(f"Card was not added: {message}")
+            if outcome == "toast":
                 self.update_progress("Card created successfully!", 100)
-            except TimeoutException:
-                # If no success message found, check if the modal is still open
-                try:
-                    modal = self.driver.find_element(By.XPATH, "//div[contains(@class, 'modal') or contains(@class, 'dialog')]")
-                    if modal.is_displayed():
-                        self.update_progress("Form submitted but waiting for confirmation...", 95)
-                        time.sleep(2)
-                    else:
-                        self.update_progress("Form submitted successfully", 100)
-                except NoSuchElementException:
-                    self.update_progress("Form submitted successfully", 100)
+            elif outcome == "closed":
+                self.update_progress("Form submitted successfully", 100)
+            else:
+                self.update_progress("Form submitted but waiting for confirmation...", 95)
+            return outcome
                     
         except Exception as e:
             self.update_progress(f"Error submitting form: {str(e)}", 90)
             raise Exception(f"Failed to submit form: {str(e)}")
     
-    def verify_card_creation(self):
-        """Verify that the card was actually created"""
+    @staticmethod
+    def _visible_text(driver, xpath: str) -> Optional[str]:
+        """Text of the first displayed element matching xpath, or None"""
+        for element in driver.find_elements(By.XPATH, xpath):
+            try:
+                if element.is_displayed():
+                    return element.text
+            except StaleElementReferenceException:
+                continue
+        return None
+
+    @classmethod
+    def _submit_outcome(cls, modal_seen: bool):
+        """
+        Wait condition: 'toast' once a success message is visible, 'error' once an error
+        message is, and 'closed' once the add-card modal seen before submitting is gone.
+        """
+        def outcome(driver):
+            if cls._visible_text(driver, SUCCESS_TOAST_XPATH) is not None:
+                return "toast"
+            if cls._visible_text(driver, ERROR_TOAST_XPATH) is not None:
+                return "error"
+            if not modal_seen:
+                # No modal was ever located, so its absence proves nothing
+                return False
+            modals = driver.find_elements(By.XPATH, CARD_FORM_XPATH)
+            try:
+                if not any(modal.is_displayed() for modal in modals):
+                    return "closed"
+            except StaleElementReferenceException:
+                return False
+            return False
+        return outcome
+
+    def wait_for_submit_result(self, modal_seen: bool = True) -> Optional[str]:
+        """Wait up to SUBMIT_RESULT_TIMEOUT for the submit outcome; None if it never shows"""
+        try:
+            return WebDriverWait(self.driver, SUBMIT_RESULT_TIMEOUT, poll_frequency=0.1).until(self._submit_outcome(modal_seen))
+        except TimeoutException:
+            return None
+
+    def verify_card_creation(self, outcome: Optional[str]):
+        """Report whether the card was created, from the outcome submit_form already waited for"""
         self.update_progress("Verifying card creation...", 95)
         
         try:
-            # Wait a bit for the card to be processed
-            time.sleep(2)
-            
-            # Check if there's a success message or if the modal closed
-            try:
-                # Look for success indicators
-                success_indicators = [
-                    "//*[contains(text(), 'success')]",
-                    "//*[contains(text(), 'added')]", 
-                    "//*[contains(text(), 'created')]",
-                    "//*[contains(text(), 'saved')]"
-                ]
-                
-                for indicator in success_indicators:
-                    try:
-                        success_element = self.driver.find_element(By.XPATH, indicator)
-                        if success_element.is_displayed():
-                            self.update_progress("Card creation verified!", 100)
-                            return True
-                    except NoSuchElementException:
-                        continue
-                
-                # If no success message found, check if modal closed
-                try:
-                    modal = self.driver.find_element(By.XPATH, "//div[contains(@class, 'modal') or contains(@class, 'dialog')]")
-                    if not modal.is_displayed():
-                        self.update_progress("Modal closed - card likely created", 100)
-                        return True
-                except NoSuchElementException:
-                    self.update_progress("Modal not found - card likely created", 100)
-                    return True
-                
+            if outcome == "toast":
+                self.update_progress("Card creation verified!", 100)
+            elif outcome == "closed":
+                self.update_progress("Modal closed - card likely created", 100)
+            else:
                 self.update_progress("Card creation status unclear", 100)
-                return True
-                
-            except Exception as e:
-                self.update_progress(f"Error verifying card creation: {str(e)}", 95)
-                return False
+            return True
                 
         except Exception as e:
             self.update_progress(f"Error in verification: {str(e)}", 95)
@@ -580,6 +833,31 @@ class SeleniumCardService:
         """Clean up resources"""
         if self.driver:
             self.driver.quit()
+
+    def export_trace(self, duration: float) -> Dict[str, Any]:
+        """The run's trace as a JSON-serializable dict"""
+        return {**self.trace, "total_ms": round(duration * 1000, 1)}
+
+    def use_pooled_browser(self) -> PooledBrowser:
+        """Check a warm, logged-in browser out of the pool instead of launching one"""
+        self.update_progress("Waiting for a browser...", 5)
+        checkout_started = time.time()
+        with self.step("checkout_browser"):
+            browser = (self.pool or browser_pool).checkout()
+        if browser.created_at >= checkout_started:
+            # Launched on demand for this job, so its launch steps are part of this run
+            for launch_step in getattr(browser.driver, "launch_steps", []):
+                self.trace["steps"].append({**launch_step, "pool_launch": True})
+        self.driver = browser.driver
+        self.trace["network_filter"] = getattr(self.driver, "network_filter", None)
+        self.wait = WebDriverWait(self.driver, 20)
+        if getattr(self.driver, "logged_in", False):
+            # The browser keeps its login between jobs; only a new or renewed session is set again
+            with self.step("refresh_session"):
+                if refresh_browser_session(self.driver):
+                    self.update_progress("Session refreshed", 30)
+        self.update_progress("Browser ready and logged in", 30)
+        return browser
             
     async def create_card_with_selenium(
         self, 
@@ -589,28 +867,32 @@ class SeleniumCardService:
     ) -> Dict[str, any]:
         """Main method to create a card using Selenium"""
         start_time = time.time()
+        browser = None
         
         try:
-            # Setup driver
-            self.setup_driver(headless=True)
-            
-            # Login
-            if not self.login_with_cookies():
-                raise Exception("Failed to login")
+            # Warm browsers are already launched and logged in
+            browser = self.use_pooled_browser()
                 
             # Navigate and fill form
-            self.navigate_to_checkout(checkout_url)
+            with self.step("navigate_to_checkout"):
+                self.navigate_to_checkout(checkout_url)
             
-            self.select_client(client_name)
+            with self.step("select_client"):
+                self.select_client(client_name)
             
-            self.open_card_form()
+            with self.step("open_card_form"):
+                self.open_card_form()
             
-            self.fill_card_form(card_data)
+            with self.step("fill_card_form"):
+                self.fill_card_form(card_data)
             
-            self.verify_card_number_entered() # Added this line
-            self.submit_form()
+            with self.step("verify_card_number_entered"):
+                self.verify_card_number_entered() # Added this line
+            with self.step("submit_form"):
+                outcome = self.submit_form()
             
-            self.verify_card_creation()
+            with self.step("verify_card_creation"):
+                self.verify_card_creation(outcome)
             
             # Calculate duration
             duration = time.time() - start_time
@@ -618,17 +900,66 @@ class SeleniumCardService:
             return {
                 "success": True,
                 "message": "Card created successfully via Selenium",
-                "duration": f"{duration:.2f} seconds"
+                "duration": f"{duration:.2f} seconds",
+                "trace": self.export_trace(duration)
             }
             
         except Exception as e:
+            duration = time.time() - start_time
             return {
                 "success": False,
                 "message": f"Failed to create card: {str(e)}",
-                "duration": f"{time.time() - start_time:.2f} seconds"
+                "duration": f"{duration:.2f} seconds",
+                "trace": self.export_trace(duration)
             }
         finally:
-            self.cleanup()
+            if browser:
+                (self.pool or browser_pool).checkin(browser)
+            self.driver = None
+            self.wait = None
+
+def launch_pooled_browser(headless: bool = True, login: bool = True):
+    """Start a Chrome and log it in; used by the pool to fill free slots"""
+    service = SeleniumCardService()
+    with service.step("setup_driver"):
+        service.setup_driver(headless=headless)
+    if login:
+        with service.step("login_with_cookies"):
+            logged_in = service.login_with_cookies()
+        if not logged_in:
+            service.cleanup()
+            raise Exception("Failed to login")
+    # Picked up by the job that triggered the launch, see use_pooled_browser
+    service.driver.launch_steps = service.trace["steps"]
+    service.driver.network_filter = service.trace.get("network_filter")
+    service.driver.logged_in = login
+    return service.driver
+
+def reset_pooled_browser(driver):
+    """Bring a browser back to a blank page between jobs, keeping its login cookies"""
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+    driver.switch_to.default_content()
+    # Pages without a web origin (e.g. about:blank after a failed job) deny storage access
+    driver.execute_script("try { window.sessionStorage.clear(); } catch (e) {}")
+    driver.get("about:blank")
+
+def run_card_job(
+    checkout_url: str,
+    card_data: Dict[str, str],
+    client_name: str,
+    progress_callback: Optional[Callable[[str, int], None]] = None
+) -> Dict[str, any]:
+    """Run one card automation on its own service instance (blocking)"""
+    service = SeleniumCardService(progress_callback)
+    return asyncio.run(service.create_card_with_selenium(
+        checkout_url=checkout_url,
+        card_data=card_data,
+        client_name=client_name
+    ))
 
-# Global instance
-selenium_service = SeleniumCardService() 
\ No newline at end of file
+# Shared by all runs in this process; sized by SELENIUM_POOL_SIZE
+browser_pool = BrowserPool(factory=launch_pooled_browser, reset=reset_pooled_browser) 
\ No newline at end of file
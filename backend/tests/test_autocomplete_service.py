@@ -0,0 +1,60 @@
+import pytest
+
+from autocomplete_service import AutocompleteIndex, normalize
+
+@pytest.fixture
+def index():
+    autocomplete = AutocompleteIndex()
+    autocomplete.add_many([
+        {"id": "h1", "name": "Baur au Lac", "physical_city": "Zürich", "physical_country": "Switzerland", "total_review_count": 900},
+        {"id": "h2", "name": "The Plaza Hotel", "physical_city": "New York", "physical_country": "United States", "location": "Manhattan", "total_review_count": 5000},
+        {"id": "h3", "name": "Plaza Athénée", "physical_city": "Paris", "physical_country": "France", "total_review_count": 1200},
+        {"id": "h4", "name": "Park Hyatt", "physical_city": "Zürich", "physical_country": "Switzerland", "total_review_count": 300}
+    ])
+    return autocomplete
+
+def labels(results):
+    return [result["label"] for result in results]
+
+def test_normalize_casefolds_and_strips_accents():
+    assert normalize("  Zürich  ") == "zurich"
+    assert normalize("Plaza  ATHÉNÉE") == "plaza athenee"
+
+def test_accent_insensitive_prefix(index):
+    assert labels(index.suggest("zur")) == ["Zürich, Switzerland"]
+    assert labels(index.suggest("athenee")) == ["Plaza Athénée"]
+
+def test_matches_any_word_but_ranks_label_start_first(index):
+    # 'Plaza Athénée' starts with the query, so it beats the more reviewed 'The Plaza Hotel'
+    assert labels(index.suggest("plaza")) == ["Plaza Athénée", "The Plaza Hotel"]
+
+def test_ranks_by_weight_among_equal_matches(index):
+    index.add({"id": "h5", "name": "Plaza Mayor Inn", "total_review_count": 10})
+    assert labels(index.suggest("plaza")) == ["Plaza Athénée", "Plaza Mayor Inn", "The Plaza Hotel"]
+    index.add({"id": "h5", "name": "Plaza Mayor Inn", "total_review_count": 2000})
+    assert labels(index.suggest("plaza")) == ["Plaza Mayor Inn", "Plaza Athénée", "The Plaza Hotel"]
+
+def test_city_counts_each_hotel_once(index):
+    index.add({"id": "h4", "name": "Park Hyatt", "physical_city": "Zürich", "physical_country": "Switzerland"})
+    index.add({"id": "h6", "name": "Paris Plaza", "physical_city": "Paris", "physical_country": "France"})
+    index.add({"id": "h7", "name": "Paris Gare", "physical_city": "Paris", "physical_country": "France"})
+    # Paris now has three hotels, Zürich still two
+    assert labels(index.suggest("par", types=["city"])) == ["Paris, France"]
+    city_terms = {term["label"]: term["weight"] for term in index._terms.values() if term["type"] == "city"}
+    assert city_terms == {"Zürich, Switzerland": 2, "New York, United States": 1, "Paris, France": 3}
+
+def test_types_filter_and_result_shape(index):
+    results = index.suggest("man", types=["destination"])
+    assert results == [{"type": "destination", "label": "Manhattan"}]
+    hotel = index.suggest("baur", types=["hotel"])[0]
+    assert hotel == {"type": "hotel", "label": "Baur au Lac", "id": "h1", "city": "Zürich", "country": "Switzerland"}
+    assert index.suggest("baur", types=["city"]) == []
+
+def test_renamed_hotel_drops_old_keys(index):
+    index.add({"id": "h4", "name": "Hyatt Zurich", "physical_city": "Zürich", "physical_country": "Switzerland"})
+    assert "Park Hyatt" not in labels(index.suggest("park"))
+    assert "Hyatt Zurich" in labels(index.suggest("zur"))
+
+def test_empty_query_and_limit(index):
+    assert index.suggest("   ") == []
+    assert len(index.suggest("p", limit=2)) == 2
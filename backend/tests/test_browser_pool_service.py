@@ -0,0 +1,164 @@
+import threading
+
+import pytest
+
+import browser_pool_service
+from browser_pool_service import BrowserPool, BrowserPoolTimeout
+
+class FakeDriver:
+    def __init__(self):
+        self.healthy = True
+        self.quit_calls = 0
+
+    def execute_script(self, script):
+        if not self.healthy:
+            raise RuntimeError("session deleted")
+        return 1
+
+    def quit(self):
+        self.quit_calls += 1
+
+class FakeFactory:
+    def __init__(self):
+        self.drivers = []
+
+    def __call__(self):
+        driver = FakeDriver()
+        self.drivers.append(driver)
+        return driver
+
+@pytest.fixture
+def factory():
+    return FakeFactory()
+
+def make_pool(factory, size=1, reset=None):
+    pool = BrowserPool(factory=factory, reset=reset, size=size)
+    # No recycling unless a test opts in
+    pool.max_jobs = pool.max_age = pool.max_rss_mb = 0
+    return pool
+
+def test_reuses_checked_in_browser(factory):
+    pool = make_pool(factory)
+    first = pool.checkout()
+    pool.checkin(first)
+    second = pool.checkout()
+    assert second is first
+    assert second.jobs == 1
+    assert len(factory.drivers) == 1
+
+def test_launches_up_to_size_then_blocks(factory):
+    pool = make_pool(factory, size=2)
+    browsers = [pool.checkout(), pool.checkout()]
+    assert len({browser.id for browser in browsers}) == 2
+    with pytest.raises(BrowserPoolTimeout):
+        pool.checkout(timeout=0.05)
+    # A check-in wakes a waiting job
+    threading.Timer(0.05, pool.checkin, [browsers[0]]).start()
+    assert pool.checkout(timeout=2) is browsers[0]
+
+def test_replaces_unhealthy_browser(factory):
+    pool = make_pool(factory)
+    browser = pool.checkout()
+    pool.checkin(browser)
+    browser.driver.healthy = False
+    replacement = pool.checkout()
+    assert replacement is not browser
+    assert browser.driver.quit_calls == 1
+    assert pool.stats()["recycled"] == {"unhealthy": 1}
+
+def test_drops_browser_when_reset_fails(factory):
+    def reset(driver):
+        raise RuntimeError("cannot clear cookies")
+
+    pool = make_pool(factory, reset=reset)
+    browser = pool.checkout()
+    pool.checkin(browser)
+    stats = pool.stats()
+    assert stats["browsers"] == 0 and stats["idle"] == 0
+    assert stats["recycled"] == {"reset_failed": 1}
+    assert browser.driver.quit_calls == 1
+
+def test_factory_failure_frees_the_slot(factory):
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("chrome failed to start")
+        return factory()
+
+    pool = make_pool(flaky)
+    with pytest.raises(RuntimeError):
+        pool.checkout()
+    assert pool.checkout(timeout=0.1).driver is factory.drivers[0]
+
+def test_warm_and_close(factory):
+    pool = make_pool(factory, size=3)
+    assert pool.warm() == 3
+    assert pool.stats()["idle"] == 3
+    busy = pool.checkout()
+    pool.close()
+    assert [driver.quit_calls for driver in factory.drivers].count(1) == 2
+    # Browsers still checked out are quit when they come back
+    pool.checkin(busy)
+    assert busy.driver.quit_calls == 1
+    assert pool.stats()["browsers"] == 0
+
+def test_recycle_reason(factory):
+    pool = make_pool(factory)
+    browser = pool.checkout()
+    assert pool.recycle_reason(browser) is None
+
+    pool.max_jobs = 3
+    browser.jobs = 3
+    assert pool.recycle_reason(browser) == "jobs"
+    browser.jobs = 0
+
+    pool.max_age = 60
+    browser.created_at -= 61
+    assert pool.recycle_reason(browser) == "age"
+    pool.max_age = 0
+
+    pool.max_rss_mb = 100
+    browser.rss_bytes = None
+    assert pool.recycle_reason(browser) is None
+    browser.rss_bytes = 100 * 1048576
+    assert pool.recycle_reason(browser) == "rss"
+
+def test_recycles_on_checkin_after_max_jobs(factory):
+    pool = make_pool(factory)
+    pool.max_jobs = 2
+    first = pool.checkout()
+    pool.checkin(first)
+    assert pool.checkout() is first
+    pool.checkin(first)
+    assert first.driver.quit_calls == 1
+    replacement = pool.checkout()
+    assert replacement is not first and replacement.jobs == 0
+    assert pool.stats()["recycled"] == {"jobs": 1}
+
+def test_recycles_idle_browser_on_checkout_after_max_age(factory):
+    pool = make_pool(factory)
+    browser = pool.checkout()
+    pool.checkin(browser)
+    pool.max_age = 60
+    browser.created_at -= 61
+    assert pool.checkout() is not browser
+    assert pool.stats()["recycled"] == {"age": 1}
+
+def test_sample_all_recycles_only_idle_browsers(factory, monkeypatch):
+    monkeypatch.setattr(browser_pool_service, "process_tree_rss", lambda pid: 600 * 1048576)
+
+    pool = make_pool(factory, size=2)
+    pool.warm()
+    busy = pool.checkout()
+    pool.max_rss_mb = 500
+    pool.sample_all()
+    stats = pool.stats()
+    assert stats["recycled"] == {"rss": 1}
+    assert stats["idle"] == 0
+    assert [browser["id"] for browser in stats["browser_stats"]] == [busy.id]
+    assert stats["browser_stats"][0]["rss_mb"] == 600.0
+    # The busy browser is recycled when it comes back
+    pool.checkin(busy)
+    assert pool.stats()["recycled"] == {"rss": 2}
@@ -0,0 +1,56 @@
+import pytest
+
+import cache_service
+from cache_service import TTLCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_service.time, "monotonic", lambda: now[0])
+    return now
+
+def test_get_returns_default_after_expiry(clock):
+    cache = TTLCache(ttl_seconds=60)
+    cache.set("hotel", {"id": 1})
+    clock[0] += 59
+    assert cache.get("hotel") == {"id": 1}
+    clock[0] += 1
+    assert cache.get("hotel", "missing") == "missing"
+    # Expired entries are dropped on read
+    assert len(cache) == 0
+
+def test_per_entry_ttl_overrides_default(clock):
+    cache = TTLCache(ttl_seconds=60)
+    cache.set("short", 1, ttl_seconds=5)
+    cache.set("long", 2)
+    clock[0] += 10
+    assert "short" not in cache
+    assert "long" in cache
+
+def test_evicts_least_recently_used(clock):
+    cache = TTLCache(ttl_seconds=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+def test_invalidate_removes_matching_keys(clock):
+    cache = TTLCache(ttl_seconds=60)
+    cache.set(("rates", "h1", "2025-01-01"), 1)
+    cache.set(("rates", "h1", "2025-02-01"), 2)
+    cache.set(("rates", "h2", "2025-01-01"), 3)
+    assert cache.invalidate(lambda key: key[1] == "h1") == 2
+    assert len(cache) == 1
+    assert cache.get(("rates", "h2", "2025-01-01")) == 3
+
+def test_pop_and_clear(clock):
+    cache = TTLCache(ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "gone") == "gone"
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,62 @@
+import math
+
+import pytest
+
+from fx_service import FXService, FXUnavailableError
+
+@pytest.fixture
+def fx():
+    service = FXService()
+    service._table = FXService.parse({"base": "USD", "as_of": "2025-01-01", "rates": {"EUR": 0.5, "GBP": "0.25", "BAD": "x", "ZERO": 0}})
+    return service
+
+def test_parse_keeps_valid_positive_rates():
+    base, index, column, as_of = FXService.parse({"base_code": "usd", "time_last_update_utc": "today", "rates": {"eur": 0.9, "XXX": None}})
+    assert base == "USD"
+    assert as_of == "today"
+    assert set(index) == {"USD", "EUR"}
+    assert column[index["EUR"]] == 0.9
+
+def test_parse_requires_base_and_rates():
+    with pytest.raises(ValueError):
+        FXService.parse({"rates": {"EUR": 1}})
+    with pytest.raises(ValueError):
+        FXService.parse({"base": "USD"})
+
+def test_factors_between_any_two_currencies(fx):
+    factors = fx.factors(["USD", "eur", "GBP", "JPY", None], "EUR")
+    assert list(factors[:3]) == [0.5, 1.0, 2.0]
+    # Unknown source currencies cannot be converted
+    assert math.isnan(factors[3]) and math.isnan(factors[4])
+    # Non-numeric and zero rates were dropped when the table was parsed
+    assert all(math.isnan(factor) for factor in fx.factors(["BAD", "ZERO"], "USD"))
+
+def test_factors_rejects_unknown_target(fx):
+    with pytest.raises(ValueError):
+        fx.factors(["USD"], "JPY")
+
+def test_factors_without_table():
+    with pytest.raises(FXUnavailableError):
+        FXService().factors(["USD"], "EUR")
+
+def test_convert_rates(fx):
+    rates = [
+        {"id": "a", "currency": "USD", "total": 100, "nightly_rate": 50},
+        {"id": "b", "currency": "EUR", "total": 80},
+        {"id": "c", "currency": "JPY", "total": 1000},
+        {"id": "d", "currency": "GBP", "total": "n/a"},
+        "not a record"
+    ]
+    converted = fx.convert_rates(rates, "eur")
+    assert converted[0] == {
+        "id": "a", "currency": "EUR", "total": 50.0, "nightly_rate": 25.0,
+        "original_currency": "USD", "original_total": 100, "original_nightly_rate": 50,
+        "is_indicative": True
+    }
+    # Already in the target currency, or in an unknown one: returned as is
+    assert converted[1] is rates[1]
+    assert converted[2] is rates[2]
+    assert converted[3]["total"] is None and converted[3]["original_total"] == "n/a"
+    assert converted[4] == "not a record"
+    # The input records are not modified
+    assert rates[0]["currency"] == "USD"
@@ -0,0 +1,67 @@
+import pytest
+
+from geo_index_service import GeoIndex, extract_coordinates, haversine_km
+
+def hotel(supplier_id, latitude, longitude, **fields):
+    return {"id": supplier_id, "coordinates": {"latitude": latitude, "longitude": longitude}, **fields}
+
+@pytest.fixture
+def index():
+    geo = GeoIndex(cell_size_degrees=0.25)
+    geo.add_many([
+        hotel("louvre", 48.8606, 2.3376, name="Near the Louvre"),
+        hotel("eiffel", 48.8584, 2.2945, name="Near the Eiffel Tower"),
+        hotel("versailles", 48.8049, 2.1204, name="Versailles"),
+        hotel("london", 51.5074, -0.1278, name="London")
+    ])
+    return geo
+
+def test_extract_coordinates_accepts_alternate_keys_and_rejects_invalid():
+    assert extract_coordinates({"coordinates": {"lat": "1.5", "lng": "2"}}) == (1.5, 2.0)
+    assert extract_coordinates({"latitude": 10, "longitude": 20}) == (10.0, 20.0)
+    assert extract_coordinates({"coordinates": {"latitude": 91, "longitude": 0}}) is None
+    assert extract_coordinates({"name": "no location"}) is None
+
+def test_haversine_km_paris_to_london():
+    assert haversine_km(48.8566, 2.3522, 51.5074, -0.1278) == pytest.approx(343.5, abs=1)
+
+def test_add_skips_records_without_id_or_coordinates(index):
+    assert not index.add({"coordinates": {"latitude": 1, "longitude": 1}})
+    assert not index.add({"id": "nowhere"})
+    assert len(index) == 4
+
+def test_nearby_returns_matches_nearest_first(index):
+    results = index.nearby(48.8566, 2.3522, radius_km=10)
+    assert [result["id"] for result in results] == ["louvre", "eiffel"]
+    assert results[0]["distance_km"] < results[1]["distance_km"]
+    assert results[0]["name"] == "Near the Louvre"
+    assert [result["id"] for result in index.nearby(48.8566, 2.3522, radius_km=30)] == ["louvre", "eiffel", "versailles"]
+    assert len(index.nearby(48.8566, 2.3522, radius_km=30, limit=1)) == 1
+
+def test_within_bounds(index):
+    ids = {result["id"] for result in index.within_bounds(48.8, 2.2, 48.9, 2.4)}
+    assert ids == {"louvre", "eiffel"}
+
+def test_moved_point_leaves_its_old_cell(index):
+    index.add(hotel("louvre", 51.5, -0.12))
+    assert "louvre" not in {result["id"] for result in index.within_bounds(48.8, 2.2, 48.9, 2.4)}
+    assert "louvre" in {result["id"] for result in index.nearby(51.5074, -0.1278, radius_km=5)}
+    # Fields from the earlier, richer record are kept
+    assert index.nearby(51.5, -0.12, radius_km=1)[0]["name"] == "Near the Louvre"
+
+def test_within_bounds_across_the_antimeridian():
+    geo = GeoIndex(cell_size_degrees=0.25)
+    geo.add_many([
+        hotel("fiji", -17.7, 178.4),
+        hotel("samoa", -13.8, -171.8),
+        hotel("sydney", -33.9, 151.2)
+    ])
+    # west > east: the viewport runs from 170E across 180 to 170W
+    ids = {result["id"] for result in geo.within_bounds(-20, 170, -10, -170)}
+    assert ids == {"fiji", "samoa"}
+
+def test_nearby_across_the_antimeridian():
+    geo = GeoIndex(cell_size_degrees=0.25)
+    geo.add_many([hotel("east", -16.0, 179.9), hotel("west", -16.0, -179.9)])
+    # The two points are about 21 km apart on either side of 180 degrees
+    assert {result["id"] for result in geo.nearby(-16.0, 179.95, radius_km=20)} == {"east", "west"}
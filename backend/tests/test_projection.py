@@ -0,0 +1,48 @@
+from main import parse_fields_param, project_fields
+
+def test_parse_fields_param_builds_nested_tree():
+    assert parse_fields_param("id, name,coordinates.latitude") == {
+        "id": None,
+        "name": None,
+        "coordinates": {"latitude": None}
+    }
+
+def test_parse_fields_param_empty_means_no_projection():
+    assert parse_fields_param(None) is None
+    assert parse_fields_param("") is None
+    assert parse_fields_param(" , . ") is None
+
+def test_parse_fields_param_whole_subtree_wins():
+    # Selecting the parent keeps the whole subtree, in either order
+    assert parse_fields_param("coordinates,coordinates.latitude") == {"coordinates": None}
+    assert parse_fields_param("coordinates.latitude,coordinates") == {"coordinates": None}
+
+def test_project_fields_keeps_envelope_metadata():
+    data = {
+        "count": 2,
+        "next": None,
+        "results": [
+            {"id": "a", "name": "A", "coordinates": {"latitude": 1, "longitude": 2}},
+            {"id": "b", "coordinates": {"latitude": 3}}
+        ]
+    }
+    assert project_fields(data, "id,name,coordinates.latitude") == {
+        "count": 2,
+        "next": None,
+        "results": [
+            {"id": "a", "name": "A", "coordinates": {"latitude": 1}},
+            {"id": "b", "coordinates": {"latitude": 3}}
+        ]
+    }
+
+def test_project_fields_plain_objects_and_lists():
+    assert project_fields({"id": 1, "name": "x", "extra": True}, "id") == {"id": 1}
+    assert project_fields([{"id": 1, "x": 2}, {"id": 3}], "id") == [{"id": 1}, {"id": 3}]
+    assert project_fields({"data": [{"id": 1, "total": 5}], "meta": {"n": 1}}, "total") == {
+        "data": [{"total": 5}],
+        "meta": {"n": 1}
+    }
+
+def test_project_fields_without_fields_returns_data_unchanged():
+    data = {"id": 1}
+    assert project_fields(data, None) is data
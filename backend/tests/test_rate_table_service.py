@@ -0,0 +1,95 @@
+import pytest
+
+from fx_service import FXService, fx_service
+from rate_table_service import RateTable
+
+def rate(supplier_id, total, currency="USD", **fields):
+    return {"id": supplier_id, "total": total, "nightly_rate": None if total is None else total / 2, "currency": currency, **fields}
+
+@pytest.fixture
+def table():
+    rates = RateTable(initial_capacity=2)
+    rates.upsert_rates([
+        rate("cheap", 100, refundable=True, is_commissionable=True, highest_commission=10),
+        rate("mid", 200, refundable=False, is_commissionable=False, highest_commission=30),
+        rate("pricey", 300, highest_commission=20),
+        rate("unrated", None)
+    ])
+    rates.upsert_hotels([
+        {"id": "cheap", "name": "Cheap", "average_review_rating": 3.5},
+        {"id": "mid", "name": "Mid", "average_review_rating": 4.8},
+        # Search results can include hotels that have no rate yet
+        {"id": "norate", "name": "No rate"}
+    ])
+    return rates
+
+@pytest.fixture
+def fx_table(monkeypatch):
+    monkeypatch.setattr(fx_service, "_table", FXService.parse({"base": "USD", "rates": {"EUR": 0.5}}))
+
+def ids(result):
+    return [row["id"] for row in result["results"]]
+
+def test_grows_past_initial_capacity_and_joins_hotels(table):
+    assert len(table) == 5
+    row = table.query(page_size=1)["results"][0]
+    assert row == {"id": "cheap", "rate": table.rates[0], "hotel": {"id": "cheap", "name": "Cheap", "average_review_rating": 3.5}}
+
+def test_rated_only_drops_rows_without_a_price(table):
+    assert ids(table.query()) == ["cheap", "mid", "pricey"]
+    assert table.query(rated_only=False)["count"] == 5
+
+def test_missing_values_sort_last_in_both_directions(table):
+    assert ids(table.query(rated_only=False))[3:] == ["unrated", "norate"]
+    assert ids(table.query(rated_only=False, descending=True)) == ["pricey", "mid", "cheap", "unrated", "norate"]
+    assert ids(table.query(sort_by="rating", descending=True)) == ["mid", "cheap", "pricey"]
+    assert ids(table.query(sort_by="rating")) == ["cheap", "mid", "pricey"]
+
+def test_sort_by_commission(table):
+    assert ids(table.query(sort_by="commission", descending=True)) == ["mid", "pricey", "cheap"]
+
+def test_rejects_unknown_sort_column(table):
+    with pytest.raises(ValueError):
+        table.query(sort_by="name")
+
+def test_tri_state_flag_filters(table):
+    assert ids(table.query(refundable=True)) == ["cheap"]
+    assert ids(table.query(refundable=False)) == ["mid"]
+    assert ids(table.query(commissionable=False)) == ["mid"]
+    # No filter keeps rows whose flag is unknown
+    assert "pricey" in ids(table.query(refundable=None, commissionable=None))
+
+def test_price_and_rating_filters(table):
+    assert ids(table.query(min_price=150, max_price=300)) == ["mid", "pricey"]
+    assert ids(table.query(min_rating=4)) == ["mid"]
+    # Rows without a price never match a price filter, even with rated_only off
+    assert ids(table.query(rated_only=False, max_price=1000)) == ["cheap", "mid", "pricey"]
+
+def test_upsert_replaces_a_rate(table):
+    table.upsert_rates([rate("pricey", 50)])
+    assert ids(table.query()) == ["pricey", "cheap", "mid"]
+    assert len(table) == 5
+
+def test_display_currency_converts_before_price_filters(table, fx_table):
+    table.upsert_rates([rate("euro", 120, currency="EUR")])
+    # In EUR: cheap 50, mid 100, pricey 150, euro 120
+    result = table.query(display_currency="EUR", min_price=90, max_price=130)
+    assert ids(result) == ["mid", "euro"]
+    converted, unchanged = [row["rate"] for row in result["results"]]
+    assert converted["total"] == 100.0 and converted["is_indicative"]
+    assert unchanged["total"] == 120 and "is_indicative" not in unchanged
+    # Without conversion the same bounds select by USD amounts
+    assert ids(table.query(min_price=90, max_price=130)) == ["cheap", "euro"]
+
+def test_pagination_edges(table):
+    first = table.query(page=1, page_size=2)
+    assert ids(first) == ["cheap", "mid"]
+    assert first["count"] == 3 and first["page"] == 1 and first["page_size"] == 2
+    assert ids(table.query(page=2, page_size=2)) == ["pricey"]
+    past_end = table.query(page=3, page_size=2)
+    assert past_end["results"] == [] and past_end["count"] == 3
+    assert ids(table.query(page=1, page_size=200)) == ["cheap", "mid", "pricey"]
+
+def test_empty_table():
+    result = RateTable().query()
+    assert result["count"] == 0 and result["results"] == []
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+
+from upstream_service import UpstreamService
+
+class BlockingCall:
+    """Stand-in for a Fora helper that blocks until released and counts its calls"""
+
+    def __init__(self, result="ok"):
+        self.result = result
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        return self.result
+
+def test_run_shared_coalesces_identical_calls():
+    call = BlockingCall({"rates": []})
+
+    async def scenario():
+        upstream = UpstreamService(max_concurrency=2)
+        first = asyncio.ensure_future(upstream.run_shared(("rates", "h1"), call))
+        second = asyncio.ensure_future(upstream.run_shared(("rates", "h1"), call))
+        await asyncio.sleep(0.05)
+        call.release.set()
+        results = await asyncio.gather(first, second)
+        return results, upstream._inflight
+
+    results, inflight = asyncio.run(scenario())
+    assert results == [{"rates": []}, {"rates": []}]
+    assert call.calls == 1
+    assert inflight == {}
+
+def test_run_shared_keeps_call_while_a_caller_waits():
+    call = BlockingCall()
+
+    async def scenario():
+        upstream = UpstreamService(max_concurrency=2)
+        first = asyncio.ensure_future(upstream.run_shared("key", call))
+        second = asyncio.ensure_future(upstream.run_shared("key", call))
+        await asyncio.sleep(0.05)
+        # One caller disconnecting must not cancel the request the other still needs
+        first.cancel()
+        await asyncio.sleep(0)
+        call.release.set()
+        return first, await second
+
+    first, result = asyncio.run(scenario())
+    assert first.cancelled()
+    assert result == "ok"
+    assert call.calls == 1
+
+def test_run_shared_cancels_once_no_caller_waits():
+    first_call = BlockingCall("stale")
+    second_call = BlockingCall("fresh")
+
+    async def scenario():
+        upstream = UpstreamService(max_concurrency=1)
+        first = asyncio.ensure_future(upstream.run_shared("key", first_call))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await asyncio.sleep(0)
+        assert "key" not in upstream._inflight
+        # A later identical call starts a fresh request instead of joining the abandoned one
+        second = asyncio.ensure_future(upstream.run_shared("key", second_call))
+        first_call.release.set()
+        second_call.release.set()
+        return await second
+
+    assert asyncio.run(scenario()) == "fresh"
+    assert second_call.calls == 1
+
+def test_run_propagates_exceptions_and_frees_the_slot():
+    def failing():
+        raise ValueError("upstream down")
+
+    async def scenario():
+        upstream = UpstreamService(max_concurrency=1)
+        try:
+            await upstream.run(failing)
+        except ValueError as e:
+            error = str(e)
+        # The budget slot was released, so the next call does not hang
+        return error, await asyncio.wait_for(upstream.run(lambda: "next"), 1)
+
+    assert asyncio.run(scenario()) == ("upstream down", "next")
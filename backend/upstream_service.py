@@ -0,0 +1,76 @@
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable
+from dotenv import load_dotenv
+from metrics_service import metrics_service
+
+load_dotenv()
+
+class UpstreamService:
+    """
+    Runs the blocking Fora API helpers off the event loop under a shared
+    concurrency budget, so fan-out endpoints cannot flood the upstream API.
+    """
+
+    def __init__(self, max_concurrency: int = None):
+        self.max_concurrency = max_concurrency or int(os.getenv("UPSTREAM_MAX_CONCURRENCY", "8"))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Dedicated pool sized to the budget; the default executor is capped by CPU count,
+        # which is far too small for I/O-bound upstream calls
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="upstream")
+        # Identical calls currently in flight: key -> {"task": Task, "waiters": int}
+        self._inflight: Dict[Hashable, Dict[str, Any]] = {}
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking upstream call in a worker thread once a budget slot is free"""
+        await self._semaphore.acquire()
+        loop = asyncio.get_running_loop()
+        call = self._executor.submit(functools.partial(func, *args, **kwargs))
+        try:
+            result = await asyncio.wrap_future(call)
+        except asyncio.CancelledError:
+            if call.cancel() or call.done():
+                self._semaphore.release()
+            else:
+                # A thread that is already talking to Fora cannot be interrupted; it keeps its
+                # budget slot until the call returns so the budget stays honest
+                call.add_done_callback(lambda _: loop.call_soon_threadsafe(self._semaphore.release))
+            metrics_service.increment("upstream.cancelled")
+            raise
+        except BaseException:
+            self._semaphore.release()
+            raise
+        self._semaphore.release()
+        return result
+
+    async def run_shared(self, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Like run(), but identical concurrent calls (same key) share one upstream request.
+        Cancelling one caller only detaches it; the shared call is cancelled once no caller
+        is waiting for it any more.
+        """
+        entry = self._inflight.get(key)
+        if entry is None:
+            entry = {"task": asyncio.ensure_future(self.run(func, *args, **kwargs)), "waiters": 0}
+            self._inflight[key] = entry
+            entry["task"].add_done_callback(lambda _: self._forget(key, entry))
+        else:
+            metrics_service.increment("upstream.coalesced")
+
+        entry["waiters"] += 1
+        try:
+            return await asyncio.shield(entry["task"])
+        finally:
+            entry["waiters"] -= 1
+            if entry["waiters"] == 0 and not entry["task"].done():
+                entry["task"].cancel()
+                self._forget(key, entry)
+
+    def _forget(self, key: Hashable, entry: Dict[str, Any]):
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+# Global instance
+upstream_service = UpstreamService()
@@ -240,6 +240,11 @@ export default function HotelCard({ hotel, loadingRate = false, loadingCard = fa
                 <div className="text-sm text-primary-600 font-medium">
                   {getTotalDisplay()}
                 </div>
+                {hotel.rate.is_indicative && (
+                  <div className="text-xs text-gray-500 mt-1" title={`Converted from ${formatRate(hotel.rate.original_total, hotel.rate.original_currency)}`}>
+                    Approx., converted from {hotel.rate.original_currency}
+                  </div>
+                )}
               </div>
             </div>
             
@@ -1,6 +1,6 @@
 'use client'
 
-import React, { useState, useEffect } from 'react'
+import React, { useState } from 'react'
 import { ApiService } from '../services/api'
 
 interface SeleniumCardFormProps {
@@ -73,20 +73,18 @@ export default function SeleniumCardForm({
     try {
       const startTime = Date.now()
       
-      // Call the Selenium endpoint using API service
-      const result = await ApiService.createCardWithSelenium(checkoutUrl, formData, clientName)
+      // Run the Selenium job, showing its progress as the backend reports it
+      const result = await ApiService.streamCardWithSelenium(checkoutUrl, formData, clientName, update => {
+        setCurrentProgress(update.percentage)
+        setCurrentMessage(update.message)
+        setProgress(prev => [...prev, update])
+      })
       const endTime = Date.now()
       const totalDuration = ((endTime - startTime) / 1000).toFixed(2)
       setDuration(`${totalDuration} seconds`)
 
       if (result.success) {
         setStep('success')
-        setProgress(result.progress_updates || [])
-        if (result.progress_updates && result.progress_updates.length > 0) {
-          const lastUpdate = result.progress_updates[result.progress_updates.length - 1]
-          setCurrentProgress(lastUpdate.percentage)
-          setCurrentMessage(lastUpdate.message)
-        }
       } else {
         setStep('error')
         setError(result.message || 'Failed to create card')
@@ -97,52 +95,6 @@ export default function SeleniumCardForm({
     }
   }
 
-  const simulateProgress = () => {
-    const steps = [
-      { message: "Initializing payment processing...", percentage: 5 },
-      { message: "Establishing secure connection...", percentage: 10 },
-      { message: "Validating payment gateway...", percentage: 15 },
-      { message: "Loading payment interface...", percentage: 20 },
-      { message: "Authenticating payment system...", percentage: 25 },
-      { message: "Authentication successful", percentage: 30 },
-      { message: "Preparing payment form...", percentage: 35 },
-      { message: "Configuring payment details...", percentage: 40 },
-      { message: "Payment details configured", percentage: 45 },
-      { message: "Opening payment form...", percentage: 50 },
-      { message: "Payment form ready", percentage: 55 },
-      { message: "Processing card information...", percentage: 60 },
-      { message: "Card information processed", percentage: 65 },
-      { message: "Validating security details...", percentage: 70 },
-      { message: "Security validation complete", percentage: 75 },
-      { message: "Submitting payment information...", percentage: 80 },
-      { message: "Payment information submitted", percentage: 85 },
-      { message: "Finalizing payment...", percentage: 90 },
-      { message: "Payment completed successfully", percentage: 100 }
-    ]
-
-    let currentStep = 0
-    const interval = setInterval(() => {
-      if (currentStep < steps.length) {
-        const step = steps[currentStep]
-        setCurrentProgress(step.percentage)
-        setCurrentMessage(step.message)
-        setProgress(prev => [...prev, { ...step, timestamp: Date.now() }])
-        currentStep++
-      } else {
-        clearInterval(interval)
-      }
-    }, 1500) // Update every 1.5 seconds
-
-    return interval
-  }
-
-  useEffect(() => {
-    if (step === 'processing') {
-      const interval = simulateProgress()
-      return () => clearInterval(interval)
-    }
-  }, [step, clientName])
-
   if (step === 'processing') {
     return (
       <div className="fixed inset-0 bg-black bg-opacity-50 flex items-center justify-center z-50">
@@ -33,8 +33,6 @@ export default function Home() {
         console.log('🏠 HOME PAGE - 📞 About to call ApiService.fetchFeaturedHotels()...');
         const hotels = await ApiService.fetchFeaturedHotels();
         console.log('🏠 HOME PAGE - ✅ API call completed! Response received:');
-        console.log('🏠 HOME PAGE - ✅ FULL API RESPONSE:', JSON.stringify(hotels, null, 2));
-        console.log('🏠 HOME PAGE - ✅ Hotels array:', hotels);
         console.log('🏠 HOME PAGE - ✅ Number of hotels received:', hotels ? hotels.length : 'null/undefined');
         
         if (hotels && hotels.length > 0) {
@@ -10,6 +10,10 @@ import UserProfile from '../components/auth/UserProfile'
 import EmailVerificationBanner from '../components/auth/EmailVerificationBanner'
 import SignUpPopup from '../components/auth/SignUpPopup'
 
+// Rates are always fetched in this currency and converted by the backend for display, so
+// switching currency reuses cached rates instead of fetching them again
+const RATE_BASE_CURRENCY = 'USD'
+
 export default function Home() {
   const router = useRouter();
   const { user, loading: authLoading } = useAuth();
@@ -86,7 +90,7 @@ export default function Home() {
         
         for (const batch of rateBatches) {
           const rateRequest = {
-            currency: filters.currency,
+            currency: RATE_BASE_CURRENCY,
             number_of_adults: filters.adults,
             children_ages: filters.children_ages,
             start_date: filters.start_date,
@@ -96,7 +100,8 @@ export default function Home() {
           }
 
           try {
-            const rateResponse = await ApiService.getRateSummary(rateRequest)
+            const displayCurrency = filters.currency !== RATE_BASE_CURRENCY ? filters.currency : undefined
+            const rateResponse = await ApiService.getRateSummary(rateRequest, displayCurrency)
             console.log('Rate response for batch', batch, ':', rateResponse)
             if (rateResponse.data) {
               allRates.push(...rateResponse.data)
@@ -65,9 +65,11 @@ export class ApiService {
     }
   }
 
-  static async getRateSummary(request: RateSummaryRequest): Promise<RateSummaryResponse> {
+  static async getRateSummary(request: RateSummaryRequest, displayCurrency?: string): Promise<RateSummaryResponse> {
     try {
-      const response = await fetch(`${API_BASE_URL}/api/rates`, {
+      // Rates are fetched in request.currency; displayCurrency converts them locally (indicative)
+      const query = displayCurrency ? `?display_currency=${encodeURIComponent(displayCurrency)}` : ''
+      const response = await fetch(`${API_BASE_URL}/api/rates${query}`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -77,7 +79,14 @@ export class ApiService {
       })
 
       if (!response.ok) {
-        const errorData = await response.json()
+        const errorData = await response.json().catch(() => ({}))
+        // No FX table on the backend yet (503), or the table does not list displayCurrency
+        // (400): fetch the rates in the display currency instead
+        const cannotConvert = response.status === 503 ||
+          (response.status === 400 && String(errorData.detail || '').startsWith('Unsupported display currency'))
+        if (displayCurrency && cannotConvert) {
+          return ApiService.getRateSummary({ ...request, currency: displayCurrency })
+        }
         console.log('API /api/rates error response:', errorData)
         throw new Error(errorData.detail || 'Failed to fetch rates')
       }
@@ -459,7 +468,7 @@ export class ApiService {
     }
   }
 
-  // Create a card using Selenium automation
+  // Create a card using Selenium automation: queue the job, then poll until it finishes
   static async createCardWithSelenium(checkoutUrl: string, cardData: any, clientName: string = 'Testing 1'): Promise<any> {
     const url = `${API_BASE_URL}/api/selenium/create-card`;
     
@@ -483,15 +492,83 @@ export class ApiService {
         throw new Error(errorData.detail || 'Failed to create card with Selenium');
       }
       
-      const data = await response.json();
-      console.log('Card created with Selenium:', data);
-      return data;
+      const { job_id } = await response.json();
+      while (true) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const resultResponse = await fetch(`${API_BASE_URL}/api/selenium/jobs/${job_id}/result`, {
+          headers: {
+            'ngrok-skip-browser-warning': 'true',
+          },
+        });
+        if (!resultResponse.ok) {
+          const errorData = await resultResponse.json();
+          throw new Error(errorData.detail || 'Failed to fetch Selenium job result');
+        }
+        if (resultResponse.status === 200) {
+          const data = await resultResponse.json();
+          console.log('Card created with Selenium:', data);
+          return data;
+        }
+      }
     } catch (error) {
       console.error('Error creating card with Selenium:', error);
       throw error;
     }
   }
 
+  // Create a card using Selenium automation, reporting progress live over Server-Sent Events
+  static async streamCardWithSelenium(
+    checkoutUrl: string,
+    cardData: any,
+    clientName: string = 'Testing 1',
+    onProgress?: (update: { message: string, percentage: number, timestamp: number }) => void
+  ): Promise<any> {
+    const url = `${API_BASE_URL}/api/selenium/create-card/stream`;
+
+    const response = await fetch(url, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'ngrok-skip-browser-warning': 'true',
+      },
+      body: JSON.stringify({
+        checkout_url: checkoutUrl,
+        card_data: cardData,
+        client_name: clientName
+      }),
+    });
+
+    if (!response.ok || !response.body) {
+      const errorData = await response.json().catch(() => ({}));
+      console.error('Error creating card with Selenium:', errorData);
+      throw new Error(errorData.detail || 'Failed to create card with Selenium');
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      // Events are separated by a blank line; heartbeats are ':' comment lines
+      const events = buffer.split('\n\n');
+      buffer = events.pop() || '';
+      for (const event of events) {
+        if (!event.startsWith('data: ')) continue;
+        const data = JSON.parse(event.slice('data: '.length));
+        if (data.type === 'result') {
+          console.log('Card created with Selenium:', data);
+          return data;
+        }
+        if (data.type === 'progress' && onProgress) {
+          onProgress(data);
+        }
+      }
+    }
+    throw new Error('Card creation stream ended without a result');
+  }
+
   // Fetch trips for a specific client
   static async fetchTrips(clientId: string): Promise<any> {
     const url = `${API_BASE_URL}/api/trips?client_id=${encodeURIComponent(clientId)}`;
@@ -545,8 +622,11 @@ export class ApiService {
   }
 
   // Cancel a booking
-  static async cancelBooking(uniqueId: string): Promise<any> {
-    const url = `${API_BASE_URL}/api/bookings/${encodeURIComponent(uniqueId)}/cancel`;
+  static async cancelBooking(uniqueId: string, supplierId?: string): Promise<any> {
+    let url = `${API_BASE_URL}/api/bookings/${encodeURIComponent(uniqueId)}/cancel`;
+    if (supplierId) {
+      url += `?supplier_id=${encodeURIComponent(supplierId)}`;
+    }
 
     try {
       const response = await fetch(url, {
@@ -572,86 +652,30 @@ export class ApiService {
     }
   }
 
-  // Fetch featured hotels from Fora API
+  // Fetch featured hotels (served and cached by the backend)
   static async fetchFeaturedHotels(): Promise<any[]> {
-    const url = 'https://api.fora.travel/v2/user-supplier-list/bdd9fe6d-4482-4996-9508-536f89c2008d/suppliers/';
-    
-    console.log('🔍 Fetching featured hotels from:', url);
-    console.log('🔍 Starting API call...');
+    const url = `${API_BASE_URL}/api/featured-hotels`;
     
     try {
       const response = await fetch(url, {
-        method: 'GET',
-        mode: 'cors',
         headers: {
-          'Content-Type': 'application/json',
           'Accept': 'application/json',
+          'ngrok-skip-browser-warning': 'true',
         },
       });
       
-      console.log('📡 Featured hotels response status:', response.status);
-      console.log('📡 Featured hotels response ok:', response.ok);
-      console.log('📡 Featured hotels response headers:', Object.fromEntries(response.headers.entries()));
-      
       if (!response.ok) {
-        console.error('❌ Response not ok:', response.status, response.statusText);
-        const errorText = await response.text();
-        console.error('❌ Error response body:', errorText);
-        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-      }
-      
-      // First get the raw text response
-      console.log('🔍 Getting raw response text...');
-      const responseText = await response.text();
-      console.log('📝 RAW RESPONSE TEXT:', responseText);
-      
-      // Then parse it as JSON
-      console.log('🔍 About to parse JSON response...');
-      console.log('🔍 Response text length:', responseText.length);
-      console.log('🔍 Response text starts with:', responseText.substring(0, 100));
-      
-      let data;
-      try {
-        data = JSON.parse(responseText);
-        console.log('✅ JSON parsing successful!');
-      } catch (parseError) {
-        console.error('💥 JSON parsing failed:', parseError);
-        console.error('💥 Raw text that failed to parse:', responseText);
-        throw new Error(`Failed to parse JSON response: ${parseError}`);
+        const errorData = await response.json().catch(() => ({}));
+        console.error('Error fetching featured hotels:', errorData);
+        throw new Error(errorData.detail || `HTTP ${response.status}: ${response.statusText}`);
       }
-      console.log('✅ Featured hotels API SUCCESS!');
-      console.log('✅ RAW API RESPONSE (FULL):', data);
-      console.log('✅ RAW API RESPONSE (STRINGIFIED):', JSON.stringify(data, null, 2));
-      console.log('✅ Response type:', typeof data);
-      console.log('✅ Response is array:', Array.isArray(data));
-      console.log('✅ Featured hotels count:', data ? data.length : 'data is null/undefined');
-      console.log('✅ Featured hotels data structure:', data && data[0] ? Object.keys(data[0]) : 'No first item or data is empty');
-      
-      // Log each hotel's ID to verify
-      if (data && data.length > 0) {
-        console.log('✅ Hotel IDs from API:');
-        data.slice(0, 5).forEach((hotel: any, index: number) => {
-          console.log(`   ${index + 1}. ID: ${hotel.id} | Name: ${hotel.name}`);
-        });
-      }
-      
-      console.log('✅ Returning real API data:', data.length, 'hotels');
-      return data;
       
+      const data = await response.json();
+      console.log('✅ Featured hotels fetched:', Array.isArray(data) ? data.length : 0);
+      return Array.isArray(data) ? data : [];
     } catch (error) {
       console.error('💥 FAILED to fetch featured hotels:', error);
-      console.error('💥 Error type:', error && typeof error === 'object' && 'constructor' in error ? (error as any).constructor.name : typeof error);
-      console.error('💥 Error message:', error instanceof Error ? error.message : String(error));
-      console.error('💥 Error stack:', error instanceof Error ? error.stack : undefined);
-      
-      // Check if it's a CORS error
-      if (error instanceof TypeError && error.message && error.message.includes('fetch')) {
-        console.error('🚨 This appears to be a CORS or network error');
-        console.error('🚨 The browser may be blocking the external API call');
-      }
-      
-      // No mock data - return empty array or throw error
-      console.log('🔄 API failed, returning empty array - no mock data');
+      // No mock data - return empty array
       return [];
     }
   }
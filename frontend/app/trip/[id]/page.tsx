@@ -131,7 +131,7 @@ const TripDetailsPage: React.FC = () => {
       setCancellingBooking(true)
       
       console.log('📡 Calling API to cancel booking...')
-      await ApiService.cancelBooking(selectedBooking.unique_id)
+      await ApiService.cancelBooking(selectedBooking.unique_id, selectedBooking.supplier_ref?.id)
       console.log('✅ Booking cancelled successfully via API')
       
       // Refresh trip data to reflect the cancellation
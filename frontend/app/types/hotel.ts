@@ -41,6 +41,11 @@ export interface RateInfo {
   is_commissionable: boolean
   payout_speed: string
   children_support: string
+  // Set when the backend converted the rate locally via display_currency
+  is_indicative?: boolean
+  original_currency?: string
+  original_total?: number
+  original_nightly_rate?: number
 }
 
 export interface RateSummaryRequest {
@@ -66,6 +71,12 @@ export interface SearchFilters {
 
 export interface RateSummaryResponse {
   data: RateInfo[]
+  fx?: {
+    base_currency: string
+    as_of: string | null
+    indicative: boolean
+    display_currency: string
+  }
 }
 
 export interface HotelRatesResponse {